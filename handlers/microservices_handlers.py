@@ -4,11 +4,14 @@ All handlers use the orchestrator to interact with business services.
 """
 
 import logging
+import re
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import ContextTypes, ConversationHandler
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import uuid
 import asyncio
+import weakref
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 from constants import *
@@ -20,6 +23,65 @@ class HandlerError(Exception):
     """Custom exception for handler errors"""
     pass
 
+# Budget prompts only depend on constants, so format them once at import
+_BUDGET_RANGE = f"₦{MIN_BUDGET_AMOUNT:,.0f} and ₦{MAX_BUDGET_AMOUNT:,.0f}"
+_SET_BUDGET_PROMPT = (
+    "💰 **Set Your Monthly Food Budget**\n\n"
+    "Please enter your monthly food budget amount.\n"
+    f"Amount should be between {_BUDGET_RANGE}\n\n"
+    "💡 Example: 25000 (for ₦25,000)\n\n"
+    "Type /cancel to stop this process."
+)
+_INVALID_BUDGET_HINT = f"Please enter a valid amount between {_BUDGET_RANGE}"
+
+# Callback data prefix for the payment confirmation button
+_CONFIRM_KORAPAY_PREFIX = "confirm_korapay_"
+_CONFIRM_KORAPAY_PREFIX_LEN = len(_CONFIRM_KORAPAY_PREFIX)
+
+# Nigerian NUBAN account numbers are exactly 10 ASCII digits
+_ACCOUNT_NUMBER_RE = re.compile(r"\d{10}", re.ASCII)
+
+# Escape table for legacy Markdown, applied to user- and provider-supplied text
+_MARKDOWN_ESCAPE = str.maketrans({c: f"\\{c}" for c in "_*`["})
+
+def _escape_markdown(text: Any) -> str:
+    """Escape Markdown metacharacters so interpolated text renders literally."""
+    return str(text).translate(_MARKDOWN_ESCAPE)
+
+# One entry of the /menu suggestion list
+_MEAL_LINE_TEMPLATE = "{index}. **{name}** - ₦{price:,.2f}\n   📍 {description}\n\n"
+
+# Bound concurrent orchestrator work so bursts queue instead of exhausting the DB pool
+_ORCHESTRATOR_CONCURRENCY = 40
+_orchestrator_semaphore = asyncio.Semaphore(_ORCHESTRATOR_CONCURRENCY)
+_chat_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+@asynccontextmanager
+async def _orchestrator_slot(chat_id: Optional[int] = None):
+    """Hold a global orchestrator slot, serialising calls from the same chat."""
+    if chat_id is None:
+        async with _orchestrator_semaphore:
+            yield
+        return
+    
+    lock = _chat_locks.get(chat_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _chat_locks[chat_id] = lock
+    async with lock:
+        async with _orchestrator_semaphore:
+            yield
+
+# Strong references to fire-and-forget handler tasks so they are not garbage collected
+_background_tasks: set = set()
+
+def _run_in_background(coro) -> asyncio.Task:
+    """Schedule slow handler work without blocking the update that triggered it."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handles the /start command with microservices architecture."""
     user = update.effective_user
@@ -43,7 +105,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         logger.info(f"START: User {user.id} ({user.first_name}) started the bot")
         
         welcome_message = (
-            f"🍽️ **Welcome to DailyChow, {user.first_name}!**\n\n"
+            f"🍽️ **Welcome to DailyChow, {_escape_markdown(user.first_name)}!**\n\n"
             f"I'm here to help you manage your food budget and discover great meals! 🤖\n\n"
             f"**What I can do for you:**\n"
             f"💰 Set and track your monthly food budget\n"
@@ -105,15 +167,7 @@ async def set_budget_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             await update.message.reply_text("⏰ Rate limit exceeded. Please wait before setting budget again.")
             return ConversationHandler.END
         
-        message = (
-            "💰 **Set Your Monthly Food Budget**\n\n"
-            f"Please enter your monthly food budget amount.\n"
-            f"Amount should be between ₦{MIN_BUDGET_AMOUNT:,.0f} and ₦{MAX_BUDGET_AMOUNT:,.0f}\n\n"
-            f"💡 Example: 25000 (for ₦25,000)\n\n"
-            f"Type /cancel to stop this process."
-        )
-        
-        await update.message.reply_text(message, parse_mode='Markdown')
+        await update.message.reply_text(_SET_BUDGET_PROMPT, parse_mode='Markdown')
         return SET_BUDGET_AMOUNT
         
     except Exception as e:
@@ -129,7 +183,8 @@ async def set_budget_amount(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     try:
         # Validate and set budget through orchestrator
-        result = await orchestrator.set_user_budget(user_id, amount_text)
+        async with _orchestrator_slot(update.effective_chat.id):
+            result = await orchestrator.set_user_budget(user_id, amount_text)
         
         if result["success"]:
             amount = result["amount"]
@@ -147,8 +202,7 @@ async def set_budget_amount(update: Update, context: ContextTypes.DEFAULT_TYPE)
             )
         else:
             await update.message.reply_text(
-                f"❌ {result['error']}\n\n"
-                f"Please enter a valid amount between ₦{MIN_BUDGET_AMOUNT:,.0f} and ₦{MAX_BUDGET_AMOUNT:,.0f}"
+                f"❌ {result['error']}\n\n{_INVALID_BUDGET_HINT}"
             )
             return SET_BUDGET_AMOUNT
         
@@ -165,7 +219,8 @@ async def balance_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     orchestrator = get_orchestrator()
     
     try:
-        balance_data = await orchestrator.get_user_balance(user_id)
+        async with _orchestrator_slot(update.effective_chat.id):
+            balance_data = await orchestrator.get_user_balance(user_id)
         
         if balance_data["success"]:
             balance = balance_data["balance"]
@@ -231,7 +286,8 @@ async def topup_amount_korapay(update: Update, context: ContextTypes.DEFAULT_TYP
     
     try:
         # Create payment through orchestrator
-        payment_result = await orchestrator.create_payment(user_id, amount_text)
+        async with _orchestrator_slot(update.effective_chat.id):
+            payment_result = await orchestrator.create_payment(user_id, amount_text)
         
         if payment_result["success"]:
             payment_data = payment_result["payment"]
@@ -244,7 +300,7 @@ async def topup_amount_korapay(update: Update, context: ContextTypes.DEFAULT_TYP
                 ),
                 InlineKeyboardButton(
                     "✅ Confirm Payment", 
-                    callback_data=f"confirm_korapay_{payment_data['reference']}"
+                    callback_data=f"{_CONFIRM_KORAPAY_PREFIX}{payment_data['reference']}"
                 )
             ]]
             reply_markup = InlineKeyboardMarkup(keyboard)
@@ -282,15 +338,59 @@ async def confirm_korapay_payment_callback(update: Update, context: ContextTypes
     query = update.callback_query
     user_id = query.from_user.id
     orchestrator = get_orchestrator()
+    lock_held = False
     
     try:
-        await query.answer()
-        
         # Extract reference from callback data
-        reference = query.data.replace("confirm_korapay_", "")
-        
+        if not query.data.startswith(_CONFIRM_KORAPAY_PREFIX):
+            await query.answer()
+            return
+        reference = query.data[_CONFIRM_KORAPAY_PREFIX_LEN:]
+
+        # Ignore repeated presses while a verification is in flight
+        lock_held = await orchestrator.acquire_payment_lock(user_id, reference)
+        if not lock_held:
+            await query.answer("⏳ Payment is already being verified…", show_alert=True)
+            return
+
+        await query.answer("⏳ Verifying payment…")
+
+        # Verify in the background so other chats are not held up by the provider call; it releases the lock
+        _run_in_background(_verify_payment_and_edit(query, reference, user_id))
+        lock_held = False
+            
+    except Exception as e:
+        logger.error(f"Error in confirm_korapay_payment_callback for user {user_id}: {e}")
+        # e.g. answer() failing with "query is too old"; nothing else will release the lock
+        if lock_held:
+            await orchestrator.release_payment_lock(user_id, reference)
+        await query.edit_message_text(
+            "⚠️ Error verifying payment. Please try again or contact support."
+        )
+
+# Payment verifications in flight, keyed by (user_id, reference) so no caller shares another user's ownership check
+_inflight_verifications: Dict[Tuple[int, str], asyncio.Task] = {}
+
+async def _verify_payment_bounded(reference: str, user_id: int) -> Dict[str, Any]:
+    """Verify a payment while holding an orchestrator slot."""
+    async with _orchestrator_slot():
+        return await get_orchestrator().verify_payment(reference, user_id)
+
+async def _verify_payment_once(reference: str, user_id: int) -> Dict[str, Any]:
+    """Verify a payment, sharing one provider call between concurrent callers."""
+    key = (user_id, reference)
+    task = _inflight_verifications.get(key)
+    if task is None:
+        task = asyncio.create_task(_verify_payment_bounded(reference, user_id))
+        _inflight_verifications[key] = task
+        task.add_done_callback(lambda _: _inflight_verifications.pop(key, None))
+    return await asyncio.shield(task)
+
+async def _verify_payment_and_edit(query, reference: str, user_id: int) -> None:
+    """Verify a payment and edit the confirmation message with the outcome."""
+    try:
         # Verify payment through orchestrator
-        verification_result = await orchestrator.verify_payment(reference, user_id)
+        verification_result = await _verify_payment_once(reference, user_id)
         
         if verification_result["success"]:
             if verification_result["payment_successful"]:
@@ -318,10 +418,13 @@ async def confirm_korapay_payment_callback(update: Update, context: ContextTypes
             )
             
     except Exception as e:
-        logger.error(f"Error in confirm_korapay_payment_callback for user {user_id}: {e}")
+        logger.error(f"Error verifying payment {reference} for user {user_id}: {e}")
         await query.edit_message_text(
             "⚠️ Error verifying payment. Please try again or contact support."
         )
+    finally:
+        # A pending payment must be re-checkable as soon as this attempt ends
+        await get_orchestrator().release_payment_lock(user_id, reference)
 
 async def cancel_conversation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel any ongoing conversation."""
@@ -348,27 +451,35 @@ async def menu_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     orchestrator = get_orchestrator()
     
     try:
-        meal_suggestions = await orchestrator.get_meal_suggestions(user_id)
+        async with _orchestrator_slot(update.effective_chat.id):
+            meal_suggestions = await orchestrator.get_meal_suggestions(user_id)
         
         if meal_suggestions["success"]:
             suggestions = meal_suggestions["meals"]
             total_cost = meal_suggestions["total_cost"]
             balance = meal_suggestions["balance"]
             
-            message = f"🍽️ **Today's Meal Suggestions**\n\n"
-            
-            for i, meal in enumerate(suggestions, 1):
-                message += f"{i}. **{meal['name']}** - ₦{meal['price']:,.2f}\n"
-                message += f"   📍 {meal.get('description', 'Delicious meal')}\n\n"
-            
-            message += f"💰 Total Cost: ₦{total_cost:,.2f}\n"
-            message += f"💳 Your Balance: ₦{balance:,.2f}\n\n"
+            parts = ["🍽️ **Today's Meal Suggestions**\n\n"]
+            parts.extend(
+                _MEAL_LINE_TEMPLATE.format(
+                    index=i,
+                    name=_escape_markdown(meal['name']),
+                    price=meal['price'],
+                    description=_escape_markdown(meal.get('description', 'Delicious meal'))
+                )
+                for i, meal in enumerate(suggestions, 1)
+            )
+            parts.append(
+                f"💰 Total Cost: ₦{total_cost:,.2f}\n"
+                f"💳 Your Balance: ₦{balance:,.2f}\n\n"
+            )
             
             if balance >= total_cost:
-                message += "✅ You can afford all these meals!"
+                parts.append("✅ You can afford all these meals!")
             else:
-                message += "⚠️ Balance low. Consider topping up with /topup"
+                parts.append("⚠️ Balance low. Consider topping up with /topup")
             
+            message = "".join(parts)
             await update.message.reply_text(message, parse_mode='Markdown')
         else:
             await update.message.reply_text(
@@ -386,23 +497,22 @@ async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     orchestrator = get_orchestrator()
     
     try:
-        history_data = await orchestrator.get_user_history(user_id, limit=15)
+        async with _orchestrator_slot(update.effective_chat.id):
+            history_data = await orchestrator.get_user_history(user_id, limit=15)
         
         if history_data["success"] and history_data["transactions"]:
             transactions = history_data["transactions"]
-            message = "📊 **Your Recent Transactions:**\n\n"
-            
+            lines = ["📊 **Your Recent Transactions:**\n\n"]
+
             for tx in transactions:
                 amount = tx["amount"]
-                desc = tx["description"]
-                date_str = tx["created_at"].strftime("%b %d, %Y %I:%M %p")
-                
-                if amount >= 0:
-                    message += f"✅ +₦{amount:,.2f} - {desc}\n"
-                else:
-                    message += f"❌ -₦{abs(amount):,.2f} - {desc}\n"
-                message += f"   📅 {date_str}\n\n"
-            
+                sign = "✅ +" if amount >= 0 else "❌ -"
+                lines.append(
+                    f"{sign}₦{abs(amount):,.2f} - {_escape_markdown(tx['description'])}\n"
+                    f"   📅 {tx['created_at']:%b %d, %Y %I:%M %p}\n\n"
+                )
+
+            message = "".join(lines)
             await update.message.reply_text(message, parse_mode='Markdown')
         else:
             await update.message.reply_text(
@@ -450,7 +560,7 @@ async def set_bank_account_number_received(update: Update, context: ContextTypes
     
     try:
         # Validate account number
-        if not account_number.isdigit() or len(account_number) != 10:
+        if not _ACCOUNT_NUMBER_RE.fullmatch(account_number):
             await update.message.reply_text(
                 "❌ Invalid account number. Please enter a valid 10-digit Nigerian bank account number."
             )
@@ -460,7 +570,8 @@ async def set_bank_account_number_received(update: Update, context: ContextTypes
         context.user_data['bank_account_number'] = account_number
         
         # Get available banks
-        banks_result = await orchestrator.get_available_banks()
+        async with _orchestrator_slot(update.effective_chat.id):
+            banks_result = await orchestrator.get_available_banks()
         
         if banks_result["success"]:
             banks = banks_result["banks"]
@@ -470,7 +581,7 @@ async def set_bank_account_number_received(update: Update, context: ContextTypes
             message += "Please reply with the number corresponding to your bank:\n\n"
             
             for i, bank in enumerate(banks[:20], 1):  # Show first 20 banks
-                message += f"{i}. {bank['name']}\n"
+                message += f"{i}. {_escape_markdown(bank['name'])}\n"
             
             if len(banks) > 20:
                 message += f"\n... and {len(banks) - 20} more banks\n"
@@ -512,12 +623,13 @@ async def set_bank_bank_code_received(update: Update, context: ContextTypes.DEFA
                 selected_bank = banks[selected_index]
                 
                 # Set up bank account through orchestrator
-                result = await orchestrator.setup_bank_account(
-                    user_id=user_id,
-                    account_number=account_number,
-                    bank_code=selected_bank['code'],
-                    bank_name=selected_bank['name']
-                )
+                async with _orchestrator_slot(update.effective_chat.id):
+                    result = await orchestrator.setup_bank_account(
+                        user_id=user_id,
+                        account_number=account_number,
+                        bank_code=selected_bank['code'],
+                        bank_name=selected_bank['name']
+                    )
                 
                 if result["success"]:
                     await update.message.reply_text(
@@ -556,29 +668,39 @@ async def set_bank_bank_code_received(update: Update, context: ContextTypes.DEFA
 
 async def list_all_banks_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """List all supported banks."""
+    # Fetching the bank list can be slow; reply from a background task
+    _run_in_background(_send_bank_list(update))
+
+async def _send_bank_list(update: Update) -> None:
+    """Fetch supported banks and send them to the user."""
     user_id = update.effective_user.id
     orchestrator = get_orchestrator()
     
     try:
-        banks_result = await orchestrator.get_available_banks()
+        async with _orchestrator_slot(update.effective_chat.id):
+            banks_result = await orchestrator.get_available_banks()
         
         if banks_result["success"]:
             banks = banks_result["banks"]
             message = "🏦 **Supported Banks for Transfers:**\n\n"
             
             for bank in banks:
-                message += f"• {bank['name']} (Code: {bank['code']})\n"
+                message += f"• {_escape_markdown(bank['name'])} (Code: {bank['code']})\n"
             
             message += f"\n📊 Total: {len(banks)} banks supported\n"
             message += "Use /setbank to set up your account."
             
-            # Split message if too long
+            # Split message if too long, on line boundaries so no escape or bold marker is cut in half
             if len(message) > 4096:
-                await update.message.reply_text("🏦 **Supported Banks:**")
-                
                 chunk_size = 4000
-                for i in range(0, len(message), chunk_size):
-                    await update.message.reply_text(message[i:i+chunk_size])
+                chunk = ""
+                for line in message.splitlines(keepends=True):
+                    if chunk and len(chunk) + len(line) > chunk_size:
+                        await update.message.reply_text(chunk, parse_mode='Markdown')
+                        chunk = ""
+                    chunk += line
+                if chunk:
+                    await update.message.reply_text(chunk, parse_mode='Markdown')
             else:
                 await update.message.reply_text(message, parse_mode='Markdown')
         else:
@@ -4,7 +4,11 @@ Main Application - Microservices-based DailyChow Telegram Bot
 
 import logging
 import os
+import re
+import signal
 import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
 from dotenv import load_dotenv
 from telegram.ext import (
     Application,
@@ -16,12 +20,22 @@ from telegram.ext import (
     CallbackQueryHandler
 )
 from telegram import BotCommand, Update
+from telegram.request import HTTPXRequest
 import aiohttp
 from aiohttp import web
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
 
 # Import microservices
 from services.orchestrator import initialize_application, get_orchestrator
 from services.config_manager import ConfigManager
+from services.scheduler_service import make_bot_sender, setup_scheduler
 
 # Import handlers
 from handlers import microservices_handlers as handlers
@@ -37,15 +51,83 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Compiled once so callback dispatch doesn't go through re's pattern cache
+CONFIRM_KORAPAY_PATTERN = re.compile(r"^confirm_korapay_")
+
+# user_data key holding the current step of a multi-step flow (/setbudget, /topup, ...)
+FLOW_STATE_KEY = "flow_state"
+
+# Plain text messages that are not commands, shared by every text MessageHandler
+TEXT_ONLY = filters.TEXT & ~filters.COMMAND
+
+# Bot menu commands
+_BOT_COMMANDS: Tuple[BotCommand, ...] = (
+    BotCommand("start", "Welcome and get started"),
+    BotCommand("help", "Get help and commands list"),
+    BotCommand("setbudget", "Set your monthly food budget"),
+    BotCommand("menu", "Get today's meal suggestions"),
+    BotCommand("balance", "Check your wallet balance"),
+    BotCommand("topup", "Add funds to your wallet"),
+    BotCommand("setbank", "Set bank details for transfers"),
+    BotCommand("listallbanks", "List supported banks"),
+    BotCommand("history", "View spending history"),
+    BotCommand("addmealplan", "Create custom meal plan"),
+    BotCommand("viewmealplan", "View your meal plan"),
+    BotCommand("dashboard", "View your dashboard"),
+    BotCommand("testmeals", "Test meal suggestions"),
+    BotCommand("health", "Check system health"),
+    BotCommand("cancel", "Cancel current operation"),
+)
+
 class DailyChowApplication:
     """Main application class for DailyChow bot"""
     
+    # Pending updates allowed per chat before the webhook asks Telegram to retry
+    CHAT_QUEUE_SIZE = 100
+    # How many recent update_ids to remember for duplicate detection
+    RECENT_UPDATE_IDS = 1024
+    # Seconds a chat worker waits for new updates before exiting
+    CHAT_WORKER_IDLE_TIMEOUT = 300
+    # Seconds shutdown waits for already-acknowledged updates to be processed
+    UPDATE_DRAIN_TIMEOUT = 8
+    # Concurrent background payment-webhook tasks
+    MAX_WEBHOOK_TASKS = 200
+    # Telegram and payment webhooks are small; cap request bodies well below aiohttp's 1 MiB
+    WEB_MAX_BODY_SIZE = 64 * 1024
+    # Seconds to keep idle webhook connections open for reuse
+    WEB_KEEPALIVE_TIMEOUT = 75
+    # Concurrent outbound Bot API connections; PTB's default pool of 1 serialises replies
+    BOT_CONNECTION_POOL_SIZE = 64
+    # Update types the handlers consume; Telegram won't deliver anything else
+    ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+    # Quoted JSON keys of ALLOWED_UPDATES, for a cheap check on the raw webhook body
+    _ALLOWED_UPDATE_KEYS = tuple(f'"{name}"'.encode() for name in ALLOWED_UPDATES)
+    
     def __init__(self):
         self.config = None
         self.orchestrator = None
         self.telegram_app = None
         self.web_app = None
-        self.is_running = False
+        self.runner = None
+        self.scheduler: Optional[AsyncIOScheduler] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._command_dispatch: Dict[str, Any] = {}
+        self._flow_entry_points: Dict[str, Any] = {}
+        self._flow_text_states: Dict[int, Any] = {}
+        self._flow_command_states: Dict[Tuple[int, str], Any] = {}
+        self._webhook_handlers: Dict[str, Any] = {}
+        
+        # Payment webhooks are acknowledged first and processed in these tasks
+        self._webhook_semaphore = asyncio.Semaphore(self.MAX_WEBHOOK_TASKS)
+        self._webhook_tasks: set = set()
+        
+        # Per-chat update queues so webhook responses don't wait on handlers
+        self._chat_queues: Dict[int, asyncio.Queue] = {}
+        self._chat_workers: Dict[int, asyncio.Task] = {}
+        
+        # Recently queued update_ids, to drop Telegram redeliveries without reprocessing
+        self._recent_update_order: Deque[int] = deque(maxlen=self.RECENT_UPDATE_IDS)
+        self._recent_update_ids: Set[int] = set()
     
     async def initialize(self) -> bool:
         """Initialize the entire application"""
@@ -56,33 +138,59 @@ class DailyChowApplication:
             config_manager = ConfigManager()
             self.config = config_manager.get_config()
             
-            # 2. Initialize microservices
-            success = await initialize_application(bot_instance=None)  # We'll set this later
+            # 2. Initialize microservices in the background; Telegram setup below doesn't need them
+            services_task = asyncio.create_task(initialize_application(bot_instance=None))  # We'll set the bot later
+            try:
+                # 3. Initialize Telegram application
+                telegram_token = self.config['telegram']['bot_token']
+                if not telegram_token:
+                    logger.error("❌ TELEGRAM_BOT_TOKEN not found")
+                    return False
+                
+                # Shared keep-alive pool for all outbound Bot API calls
+                bot_request = HTTPXRequest(
+                    connection_pool_size=self.BOT_CONNECTION_POOL_SIZE,
+                    connect_timeout=10,
+                    read_timeout=30,
+                    pool_timeout=20
+                )
+                # Webhook-only: no Updater, so no separate getUpdates HTTP client is created
+                self.telegram_app = (
+                    Application.builder()
+                    .token(telegram_token)
+                    .request(bot_request)
+                    .updater(None)
+                    .build()
+                )
+                
+                # 4. Set up bot commands and web server for webhooks (independent API calls)
+                await asyncio.gather(
+                    self._setup_bot_commands(),
+                    self._setup_web_server()
+                )
+                
+                success = await services_task
+            finally:
+                # Don't leave service startup running if Telegram setup failed
+                services_task.cancel()
+            
             if not success:
                 logger.error("❌ Failed to initialize microservices")
                 return False
             
             self.orchestrator = get_orchestrator()
             
-            # 3. Initialize Telegram application
-            telegram_token = self.config['telegram']['bot_token']
-            if not telegram_token:
-                logger.error("❌ TELEGRAM_BOT_TOKEN not found")
-                return False
-            
-            self.telegram_app = Application.builder().token(telegram_token).build()
-            
-            # 4. Set bot instance in orchestrator
+            # 5. Set bot instance in orchestrator
             self.orchestrator.set_bot_instance(self.telegram_app.bot)
             
-            # 5. Set up handlers
+            # 6. Set up handlers
             self._setup_telegram_handlers()
             
-            # 6. Set up bot commands
-            await self._setup_bot_commands()
-            
-            # 7. Initialize web server for webhooks
-            await self._setup_web_server()
+            # 7. Register the daily jobs when enabled; they start once the app is serving
+            if self.config.get("scheduled_jobs_enabled"):
+                self._setup_scheduler()
+            else:
+                logger.info("ℹ️ Scheduled jobs disabled; set ENABLE_SCHEDULED_JOBS=true to run them")
             
             logger.info("✅ Application initialized successfully")
             return True
@@ -91,73 +199,69 @@ class DailyChowApplication:
             logger.error(f"❌ Application initialization failed: {e}")
             return False
     
+    def _setup_scheduler(self):
+        """Register the daily meal suggestion and allowance jobs"""
+        self.scheduler = AsyncIOScheduler()
+        setup_scheduler(
+            self.scheduler,
+            self.orchestrator.get_service('database'),
+            make_bot_sender(self.telegram_app.bot),
+            transfer_service=self.orchestrator.get_service('transfer')
+        )
+    
     def _setup_telegram_handlers(self):
         """Set up all Telegram command and message handlers"""
+        if self.telegram_app.handlers:
+            # Already registered on this application; adding again would double-fire
+            logger.warning("⚠️ Telegram handlers already configured, skipping")
+            return
+        
         try:
             # Initialize handlers with orchestrator
             handlers.initialize_handlers(self.orchestrator)
             
-            # Basic commands
-            self.telegram_app.add_handler(CommandHandler("start", handlers.start_command))
-            self.telegram_app.add_handler(CommandHandler("help", handlers.help_command))
-            self.telegram_app.add_handler(CommandHandler("menu", handlers.menu_command))
-            self.telegram_app.add_handler(CommandHandler("balance", handlers.balance_command))
-            self.telegram_app.add_handler(CommandHandler("history", handlers.history_command))
-            
-            # Conversation handlers
-            set_budget_conv_handler = ConversationHandler(
-                entry_points=[CommandHandler("setbudget", handlers.set_budget_start)],
-                states={
-                    SET_BUDGET_AMOUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.set_budget_amount)]
-                },
-                fallbacks=[CommandHandler("cancel", handlers.cancel_conversation)]
-            )
-            self.telegram_app.add_handler(set_budget_conv_handler)
-            
-            topup_conv_handler = ConversationHandler(
-                entry_points=[CommandHandler("topup", handlers.topup_start)],
-                states={
-                    TOPUP_AMOUNT_KORAPAY: [MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.topup_amount_korapay)]
-                },
-                fallbacks=[CommandHandler("cancel", handlers.cancel_conversation)]
-            )
-            self.telegram_app.add_handler(topup_conv_handler)
-            
-            set_bank_conv_handler = ConversationHandler(
-                entry_points=[CommandHandler("setbank", handlers.set_bank_start)],
-                states={
-                    SET_BANK_ACCOUNT_NUMBER: [MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.set_bank_account_number_received)],
-                    SET_BANK_BANK_CODE: [MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.set_bank_bank_code_received)]
-                },
-                fallbacks=[CommandHandler("cancel", handlers.cancel_conversation)]
-            )
-            self.telegram_app.add_handler(set_bank_conv_handler)
-            
-            add_meal_plan_conv_handler = ConversationHandler(
-                entry_points=[CommandHandler("addmealplan", handlers.add_meal_plan_start)],
-                states={
-                    ADD_MEAL_PLAN_DAY: [
-                        MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.add_meal_plan_day_handler),
-                        CommandHandler("skipday", handlers.add_meal_plan_day_handler),
-                        CommandHandler("done", handlers.add_meal_plan_done)
-                    ]
-                },
-                fallbacks=[CommandHandler("cancel", handlers.cancel_conversation)]
-            )
-            self.telegram_app.add_handler(add_meal_plan_conv_handler)
-            
-            # Additional commands
-            self.telegram_app.add_handler(CommandHandler("viewmealplan", handlers.view_meal_plan_command))
-            self.telegram_app.add_handler(CommandHandler("listallbanks", handlers.list_all_banks_command))
-            self.telegram_app.add_handler(CommandHandler("testmeals", handlers.test_meal_suggestions_command))
-            self.telegram_app.add_handler(CommandHandler("dashboard", handlers.dashboard_command))
-            self.telegram_app.add_handler(CommandHandler("health", handlers.health_command))
+            # Stateless commands share one handler and are dispatched by name
+            self._command_dispatch = {
+                "start": handlers.start_command,
+                "help": handlers.help_command,
+                "menu": handlers.menu_command,
+                "balance": handlers.balance_command,
+                "history": handlers.history_command,
+                "viewmealplan": handlers.view_meal_plan_command,
+                "listallbanks": handlers.list_all_banks_command,
+                "testmeals": handlers.test_meal_suggestions_command,
+                "dashboard": handlers.dashboard_command,
+                "health": handlers.health_command,
+            }
+            self.telegram_app.add_handler(CommandHandler(self._command_dispatch.keys(), self._dispatch_command))
+            
+            # Multi-step flows share one state table instead of a ConversationHandler each
+            self._flow_entry_points = {
+                "setbudget": handlers.set_budget_start,
+                "topup": handlers.topup_start,
+                "setbank": handlers.set_bank_start,
+                "addmealplan": handlers.add_meal_plan_start,
+            }
+            self._flow_text_states = {
+                SET_BUDGET_AMOUNT: handlers.set_budget_amount,
+                TOPUP_AMOUNT_KORAPAY: handlers.topup_amount_korapay,
+                SET_BANK_ACCOUNT_NUMBER: handlers.set_bank_account_number_received,
+                SET_BANK_BANK_CODE: handlers.set_bank_bank_code_received,
+                ADD_MEAL_PLAN_DAY: handlers.add_meal_plan_day_handler,
+            }
+            self._flow_command_states = {
+                (ADD_MEAL_PLAN_DAY, "skipday"): handlers.add_meal_plan_day_handler,
+                (ADD_MEAL_PLAN_DAY, "done"): handlers.add_meal_plan_done,
+            }
+            self.telegram_app.add_handler(CommandHandler(self._flow_entry_points.keys(), self._start_flow))
+            self.telegram_app.add_handler(CommandHandler(["skipday", "done"], self._dispatch_flow_command))
+            self.telegram_app.add_handler(CommandHandler("cancel", self._cancel_flow))
             
             # Callback handlers for payments
-            self.telegram_app.add_handler(CallbackQueryHandler(handlers.confirm_korapay_payment_callback, pattern=r"^confirm_korapay_"))
+            self.telegram_app.add_handler(CallbackQueryHandler(handlers.confirm_korapay_payment_callback, pattern=CONFIRM_KORAPAY_PATTERN))
             
-            # Fallback handler
-            self.telegram_app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.text_fallback_handler))
+            # Plain text goes to the active flow's current step, or the fallback handler
+            self.telegram_app.add_handler(MessageHandler(TEXT_ONLY, self._dispatch_flow_text))
             
             logger.info("✅ Telegram handlers configured")
             
@@ -165,28 +269,56 @@ class DailyChowApplication:
             logger.error(f"❌ Failed to setup handlers: {e}")
             raise
     
+    @staticmethod
+    def _command_name(update: Update) -> str:
+        """Extract the lowercase command name from a "/cmd@BotName args" message"""
+        return update.effective_message.text.split(maxsplit=1)[0][1:].split("@", 1)[0].lower()
+    
+    async def _dispatch_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Route a stateless command to its handler by name"""
+        return await self._command_dispatch[self._command_name(update)](update, context)
+    
+    @staticmethod
+    def _set_flow_state(context: ContextTypes.DEFAULT_TYPE, state: Optional[int]):
+        """Record the state a flow step returned, ConversationHandler-style"""
+        if state is None:
+            return  # Stay in the current state
+        if state == ConversationHandler.END:
+            context.user_data.pop(FLOW_STATE_KEY, None)
+        else:
+            context.user_data[FLOW_STATE_KEY] = state
+    
+    async def _start_flow(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Start a multi-step flow, replacing any flow already in progress"""
+        context.user_data.pop(FLOW_STATE_KEY, None)
+        entry_point = self._flow_entry_points[self._command_name(update)]
+        self._set_flow_state(context, await entry_point(update, context))
+    
+    async def _dispatch_flow_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Send plain text to the active flow step, or to the fallback handler"""
+        step = self._flow_text_states.get(context.user_data.get(FLOW_STATE_KEY))
+        if step is None:
+            return await handlers.text_fallback_handler(update, context)
+        self._set_flow_state(context, await step(update, context))
+    
+    async def _dispatch_flow_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle commands that are only meaningful inside a flow step"""
+        key = (context.user_data.get(FLOW_STATE_KEY), self._command_name(update))
+        step = self._flow_command_states.get(key)
+        if step is not None:
+            self._set_flow_state(context, await step(update, context))
+    
+    async def _cancel_flow(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Cancel the active flow, if there is one"""
+        if FLOW_STATE_KEY not in context.user_data:
+            return
+        await handlers.cancel_conversation(update, context)
+        context.user_data.pop(FLOW_STATE_KEY, None)
+    
     async def _setup_bot_commands(self):
         """Set up bot menu commands"""
         try:
-            commands = [
-                BotCommand("start", "Welcome and get started"),
-                BotCommand("help", "Get help and commands list"),
-                BotCommand("setbudget", "Set your monthly food budget"),
-                BotCommand("menu", "Get today's meal suggestions"),
-                BotCommand("balance", "Check your wallet balance"),
-                BotCommand("topup", "Add funds to your wallet"),
-                BotCommand("setbank", "Set bank details for transfers"),
-                BotCommand("listallbanks", "List supported banks"),
-                BotCommand("history", "View spending history"),
-                BotCommand("addmealplan", "Create custom meal plan"),
-                BotCommand("viewmealplan", "View your meal plan"),
-                BotCommand("dashboard", "View your dashboard"),
-                BotCommand("testmeals", "Test meal suggestions"),
-                BotCommand("health", "Check system health"),
-                BotCommand("cancel", "Cancel current operation")
-            ]
-            
-            await self.telegram_app.bot.set_my_commands(commands)
+            await self.telegram_app.bot.set_my_commands(_BOT_COMMANDS)
             logger.info("✅ Bot commands configured")
             
         except Exception as e:
@@ -197,53 +329,144 @@ class DailyChowApplication:
         try:
             # Get configuration
             port = int(os.environ.get("PORT", 10000))
-            webhook_path = f"/webhook/{self.config['telegram']['bot_token']}"
-            webhook_url = f"https://{os.environ.get('RENDER_EXTERNAL_HOSTNAME', 'localhost')}{webhook_path}"
+            telegram_target = self.config['telegram']['bot_token']
+            webhook_url = f"https://{os.environ.get('RENDER_EXTERNAL_HOSTNAME', 'localhost')}/webhook/{telegram_target}"
             
             # Create web application
-            self.web_app = web.Application()
-            
-            # Add routes
-            self.web_app.router.add_post(webhook_path, self._handle_webhook)
-            self.web_app.router.add_get("/", self._health_check_endpoint)
-            self.web_app.router.add_get("/health", self._health_check_endpoint)
-            self.web_app.router.add_get("/api/health", self._api_health_check)
-            self.web_app.router.add_post("/webhook/korapay", self._handle_korapay_webhook)
-            self.web_app.router.add_post("/webhook/monnify", self._handle_monnify_webhook)
+            self.web_app = self._build_web_app(telegram_target)
             
             # Set webhook
-            await self.telegram_app.bot.set_webhook(url=webhook_url)
+            await self.telegram_app.bot.set_webhook(
+                url=webhook_url,
+                allowed_updates=self.ALLOWED_UPDATES
+            )
             logger.info(f"✅ Webhook configured: {webhook_url}")
             
         except Exception as e:
             logger.error(f"❌ Failed to setup web server: {e}")
             raise
     
+    def _build_web_app(self, telegram_target: str) -> web.Application:
+        """Build the aiohttp application with all routes registered"""
+        app = web.Application(client_max_size=self.WEB_MAX_BODY_SIZE)
+        
+        # All webhooks share one route; the last path segment picks the handler
+        self._webhook_handlers = {
+            telegram_target: self._handle_webhook,
+            "korapay": self._handle_korapay_webhook,
+            "monnify": self._handle_monnify_webhook,
+        }
+        app.router.add_post("/webhook/{target}", self._route_webhook)
+        app.router.add_get("/", self._health_check_endpoint)
+        app.router.add_get("/health", self._health_check_endpoint)
+        app.router.add_get("/api/health", self._api_health_check)
+        
+        return app
+    
+    async def _route_webhook(self, request):
+        """Dispatch a webhook POST to the handler registered for its target"""
+        handler = self._webhook_handlers.get(request.match_info["target"])
+        if handler is None:
+            return web.Response(text="Not Found", status=404)
+        return await handler(request)
+    
     async def _handle_webhook(self, request):
         """Handle Telegram webhook requests"""
         try:
-            data = await request.json()
-            logger.debug(f"Webhook received: {data}")
+            raw = await request.read()
+            # Skip decoding update types no handler consumes (e.g. channel posts, edits)
+            if not any(key in raw for key in self._ALLOWED_UPDATE_KEYS):
+                return web.Response(text="OK")
+            
+            data = _json_loads(raw)
+            logger.debug("Webhook received: %s", data)
+            
+            # Telegram redelivers updates it thinks failed; handle each update_id once
+            update_id = data.get("update_id")
+            if update_id in self._recent_update_ids:
+                return web.Response(text="OK")
             
-            update = Update.de_json(data=data, bot=self.telegram_app.bot)
-            await self.telegram_app.process_update(update)
+            if not self._enqueue_update(data):
+                # Let Telegram retry later rather than dropping the update
+                return web.Response(text="BUSY", status=503)
             
+            self._remember_update_id(update_id)
             return web.Response(text="OK")
             
         except Exception as e:
             logger.error(f"❌ Webhook processing error: {e}")
             return web.Response(text="ERROR", status=500)
     
+    @staticmethod
+    def _chat_id_of(data: Dict[str, Any]) -> int:
+        """Read the chat id of a raw message or callback query update (0 if none)"""
+        message = data.get("message")
+        if message is None:
+            callback_query = data.get("callback_query") or {}
+            message = callback_query.get("message")
+            if message is None:
+                return callback_query.get("from", {}).get("id", 0)
+        return message.get("chat", {}).get("id", 0)
+    
+    def _remember_update_id(self, update_id: Optional[int]):
+        """Record a queued update_id, forgetting the oldest beyond RECENT_UPDATE_IDS"""
+        if update_id is None:
+            return
+        if len(self._recent_update_order) == self._recent_update_order.maxlen:
+            self._recent_update_ids.discard(self._recent_update_order[0])
+        self._recent_update_order.append(update_id)
+        self._recent_update_ids.add(update_id)
+    
+    def _enqueue_update(self, data: Dict[str, Any]) -> bool:
+        """Queue a raw update on its chat's worker, starting the worker if needed"""
+        chat_id = self._chat_id_of(data)
+        
+        queue = self._chat_queues.get(chat_id)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.CHAT_QUEUE_SIZE)
+            self._chat_queues[chat_id] = queue
+            self._chat_workers[chat_id] = asyncio.create_task(
+                self._process_chat_updates(chat_id, queue)
+            )
+        
+        try:
+            queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"⚠️ Update queue full for chat {chat_id}")
+            return False
+    
+    async def _process_chat_updates(self, chat_id: int, queue: asyncio.Queue):
+        """Process one chat's updates in order; exit once the chat goes idle"""
+        while True:
+            try:
+                data = await asyncio.wait_for(queue.get(), timeout=self.CHAT_WORKER_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    self._chat_queues.pop(chat_id, None)
+                    self._chat_workers.pop(chat_id, None)
+                    return
+                continue
+            
+            try:
+                # Build Telegram objects here, off the webhook response path
+                update = Update.de_json(data=data, bot=self.telegram_app.bot)
+                await self.telegram_app.process_update(update)
+            except Exception as e:
+                logger.error(f"❌ Update processing error for chat {chat_id}: {e}")
+            finally:
+                queue.task_done()
+    
     async def _handle_korapay_webhook(self, request):
         """Handle Korapay payment webhooks"""
         try:
-            data = await request.json()
-            logger.info(f"Korapay webhook received: {data}")
+            data = _json_loads(await request.read())
+            logger.debug("Korapay webhook received: %s", data)
             
             # Process with payment service
             payment_service = self.orchestrator.get_service('payment')
             if payment_service:
-                await payment_service.handle_webhook(data, 'korapay')
+                self._process_in_background(payment_service.handle_webhook(data, 'korapay'), "Korapay webhook")
             
             return web.Response(text="OK")
             
@@ -254,13 +477,13 @@ class DailyChowApplication:
     async def _handle_monnify_webhook(self, request):
         """Handle Monnify transfer webhooks"""
         try:
-            data = await request.json()
-            logger.info(f"Monnify webhook received: {data}")
+            data = _json_loads(await request.read())
+            logger.debug("Monnify webhook received: %s", data)
             
             # Process with transfer service
             transfer_service = self.orchestrator.get_service('transfer')
             if transfer_service:
-                await transfer_service.handle_webhook(data, 'monnify')
+                self._process_in_background(transfer_service.handle_webhook(data, 'monnify'), "Monnify webhook")
             
             return web.Response(text="OK")
             
@@ -268,6 +491,23 @@ class DailyChowApplication:
             logger.error(f"❌ Monnify webhook error: {e}")
             return web.Response(text="ERROR", status=500)
     
+    def _process_in_background(self, coro, label: str) -> asyncio.Task:
+        """Run webhook processing after the response is sent, bounded by a shared semaphore"""
+        async def bounded():
+            async with self._webhook_semaphore:
+                return await coro
+        
+        task = asyncio.create_task(bounded())
+        self._webhook_tasks.add(task)
+        task.add_done_callback(lambda t: self._on_webhook_task_done(t, label))
+        return task
+    
+    def _on_webhook_task_done(self, task: asyncio.Task, label: str):
+        """Forget a finished webhook task and log its failure, if any"""
+        self._webhook_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ {label} processing error: {task.exception()}")
+    
     async def _health_check_endpoint(self, request):
         """Health check endpoint"""
         return web.Response(
@@ -291,6 +531,20 @@ class DailyChowApplication:
                 'timestamp': '2025-06-19T00:00:00Z'
             }, status=500)
     
+    async def _start_telegram_app(self):
+        """Initialize and start the Telegram application"""
+        await self.telegram_app.initialize()
+        await self.telegram_app.start()
+    
+    async def _setup_web_runner(self):
+        """Prepare the aiohttp runner for the web application"""
+        self.runner = web.AppRunner(
+            self.web_app,
+            access_log=None,
+            keepalive_timeout=self.WEB_KEEPALIVE_TIMEOUT
+        )
+        await self.runner.setup()
+    
     async def run(self):
         """Run the application"""
         try:
@@ -298,27 +552,33 @@ class DailyChowApplication:
                 logger.error("❌ Failed to initialize application")
                 return
             
-            # Initialize Telegram application
-            await self.telegram_app.initialize()
-            await self.telegram_app.start()
+            # Start Telegram and prepare the web runner together; a failure in either cancels the other
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._start_telegram_app())
+                tg.create_task(self._setup_web_runner())
             
-            # Start web server
+            # Only accept webhooks once Telegram is ready to process them
             port = int(os.environ.get("PORT", 10000))
-            runner = web.AppRunner(self.web_app)
-            await runner.setup()
-            site = web.TCPSite(runner, "0.0.0.0", port)
+            site = web.TCPSite(self.runner, "0.0.0.0", port)
             await site.start()
+            if self.scheduler:
+                self.scheduler.start()
             
             logger.info(f"🚀 DailyChow bot running on port {port}")
             logger.info("✅ Application is ready to serve requests")
             
-            self.is_running = True
+            # Keep running until SIGINT/SIGTERM or stop()
+            self._stop_event = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, self.stop)
+                except NotImplementedError:
+                    # Signal handlers are not supported on Windows event loops
+                    pass
             
-            # Keep running
             try:
-                while self.is_running:
-                    await asyncio.sleep(3600)  # Sleep for 1 hour
-            except KeyboardInterrupt:
+                await self._stop_event.wait()
                 logger.info("👋 Received shutdown signal")
             finally:
                 await self.shutdown()
@@ -327,21 +587,76 @@ class DailyChowApplication:
             logger.error(f"❌ Application run error: {e}")
             await self.shutdown()
     
+    @property
+    def is_running(self) -> bool:
+        """Whether the application is serving and no stop has been requested"""
+        return self._stop_event is not None and not self._stop_event.is_set()
+    
+    def stop(self):
+        """Request a graceful shutdown of a running application"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+    
+    async def _stop_telegram_app(self):
+        """Stop and then shut down the Telegram application"""
+        await self.telegram_app.stop()
+        await self.telegram_app.shutdown()
+    
+    async def _shutdown_step(self, name: str, coro):
+        """Await one shutdown step, logging failures so sibling steps still complete"""
+        try:
+            await coro
+        except Exception as e:
+            logger.error(f"❌ {name} shutdown error: {e}")
+    
+    async def _drain_chat_queues(self):
+        """Wait, up to UPDATE_DRAIN_TIMEOUT, for every chat queue to be fully processed"""
+        queues = list(self._chat_queues.values())
+        if not queues:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in queues)),
+                timeout=self.UPDATE_DRAIN_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            dropped = sum(queue.qsize() for queue in queues)
+            logger.warning(f"⚠️ Shutdown drain timed out with {dropped} queued updates unprocessed")
+    
     async def shutdown(self):
         """Shutdown the application gracefully"""
         try:
             logger.info("🔄 Shutting down DailyChow application...")
             
-            self.is_running = False
+            # No new scheduled jobs once shutdown has begun
+            if self.scheduler and self.scheduler.running:
+                self.scheduler.shutdown(wait=False)
+            
+            # Stop accepting webhooks first so no new work arrives
+            if self.runner:
+                await self._shutdown_step("Web server", self.runner.cleanup())
+                self.runner = None
             
-            # Shutdown Telegram app
-            if self.telegram_app:
-                await self.telegram_app.stop()
-                await self.telegram_app.shutdown()
+            # Telegram won't redeliver updates we already answered, so finish the queued ones
+            await self._drain_chat_queues()
             
-            # Shutdown orchestrator
-            if self.orchestrator:
-                await self.orchestrator.shutdown()
+            # Stop per-chat update workers, and wait so none is mid-handler while services close
+            workers = list(self._chat_workers.values())
+            for worker in workers:
+                worker.cancel()
+            if workers:
+                await asyncio.gather(*workers, return_exceptions=True)
+            
+            # Let in-flight payment webhooks finish before services close
+            if self._webhook_tasks:
+                await asyncio.gather(*self._webhook_tasks, return_exceptions=True)
+            
+            # Nothing uses Telegram or the services any more, so stop them concurrently
+            async with asyncio.TaskGroup() as tg:
+                if self.telegram_app:
+                    tg.create_task(self._shutdown_step("Telegram app", self._stop_telegram_app()))
+                if self.orchestrator:
+                    tg.create_task(self._shutdown_step("Orchestrator", self.orchestrator.shutdown()))
             
             logger.info("✅ Application shutdown complete")
             
@@ -354,8 +669,20 @@ async def main():
     await app.run()
 
 if __name__ == "__main__":
+    # Prefer the libuv-based event loop where it is available
+    try:
+        import uvloop
+        run_loop = uvloop.run
+    except ImportError:
+        logger.info("uvloop not installed, using the default asyncio event loop")
+        run_loop = asyncio.run
+    except AttributeError:
+        # uvloop < 0.18 has no run(); install its loop policy instead
+        uvloop.install()
+        run_loop = asyncio.run
+    
     try:
-        asyncio.run(main())
+        run_loop(main())
     except KeyboardInterrupt:
         logger.info("👋 Application interrupted by user")
     except Exception as e:
@@ -2,72 +2,176 @@
 Bank Service - Handles bank account management and validation
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional, List
+import secrets
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from .base_service import BaseService
 
 logger = logging.getLogger(__name__)
 
+# Fields a validated bank record must carry before it can be saved
+_REQUIRED_BANK_FIELDS = frozenset(('account_number', 'bank_code', 'account_name'))
+
 class BankService(BaseService):
     """Service for managing bank accounts and validation"""
     
+    # Seconds the supported banks list is served from memory before refetching
+    BANKS_CACHE_TTL = 3600
+    # Fraction of BANKS_CACHE_TTL after which the background warmer refreshes the list
+    BANKS_REFRESH_FRACTION = 0.8
+    # Security events buffered for the background writer; the oldest is dropped when full
+    SECURITY_QUEUE_SIZE = 1000
+    # Seconds shutdown waits for buffered security events to be written
+    SECURITY_DRAIN_TIMEOUT = 5
+    # Seconds a user's bank details are served from memory; bounds staleness after writes made elsewhere
+    USER_BANK_CACHE_TTL = 300
+    
     def __init__(self, service_name: str = "bank", config: Dict[str, Any] = None):
         super().__init__(service_name, config or {})
         self.transfer_service = None  # Will be injected
         self.db_service = None  # Will be injected
+        # Only one caller refreshes the banks cache; the rest wait for its result
+        self._banks_lock = asyncio.Lock()
+        self._cached_banks: Optional[Dict[str, Any]] = None
+        # Set once set_dependencies() runs, so the warmer knows it can reach Monnify
+        self._dependencies_ready = asyncio.Event()
+        self._banks_warm_task: Optional[asyncio.Task] = None
+        
+        # LRU of (expires_at, bank details) read from the database, evicted whenever they change
+        self._user_bank_cache: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._user_bank_cache_max = 10000
+        
+        # In-flight validations keyed by (account_number, bank_code), shared by duplicate callers
+        self._validate_inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        
+        # Upper bound on Monnify calls in flight from this service
+        self.monnify_concurrency = self.config.get("monnify_concurrency", 8)
+        self._monnify_semaphore = asyncio.Semaphore(self.monnify_concurrency)
+        
+        # Secret for account number log hashes; unkeyed, every 10-digit number could be hashed and matched
+        account_hash_key = self.config.get("account_hash_key")
+        if account_hash_key:
+            self._log_hash_key = str(account_hash_key).encode()[:64]
+        else:
+            logger.warning("ACCOUNT_HASH_KEY not set; account hashes in logs will not match across restarts")
+            self._log_hash_key = secrets.token_bytes(32)
+        
+        # Security events are written off the request path by _drain_security_events
+        self._security_queue: asyncio.Queue = asyncio.Queue(maxsize=self.SECURITY_QUEUE_SIZE)
+        self._security_task: Optional[asyncio.Task] = None
     
     def set_dependencies(self, transfer_service, db_service):
         """Set service dependencies"""
         self.transfer_service = transfer_service
         self.db_service = db_service
+        self._dependencies_ready.set()
     
     async def initialize(self) -> None:
         """Initialize the bank service"""
+        self._security_task = asyncio.create_task(self._drain_security_events())
+        self._banks_warm_task = asyncio.create_task(self._keep_banks_warm())
         self.logger.info("Bank service initialized")
-        pass
     
     async def shutdown(self) -> None:
         """Shutdown the bank service"""
+        if self._banks_warm_task:
+            self._banks_warm_task.cancel()
+            self._banks_warm_task = None
+        if self._security_task:
+            try:
+                await asyncio.wait_for(self._security_queue.join(), timeout=self.SECURITY_DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.logger.warning("Dropped %d unwritten security events", self._security_queue.qsize())
+            self._security_task.cancel()
+            self._security_task = None
         self.logger.info("Bank service shutdown")
-        pass
+    
+    async def health_check(self) -> bool:
+        """Healthy once the transfer and database services are wired in"""
+        return self.transfer_service is not None and self.db_service is not None
     
     async def get_supported_banks(self) -> Optional[List[Dict[str, Any]]]:
         """Get list of supported banks from Monnify"""
         try:
+            cached = await self._get_cached_banks()
+            if cached:
+                return cached
+            
             if not self.transfer_service:
                 raise ValueError("Transfer service not initialized")
             
-            banks = await self.transfer_service.get_banks()
-            
-            if banks:
-                # Cache banks for performance
-                await self._cache_banks(banks)
-                logger.info(f"Retrieved {len(banks)} supported banks")
-                return banks
-            else:
-                logger.warning("No banks returned from transfer service")
-                return None
+            async with self._banks_lock:
+                # Another caller may have refreshed the cache while we waited
+                cached = await self._get_cached_banks()
+                if cached:
+                    return cached
+                
+                async with self._monnify_semaphore:
+                    banks = await self.transfer_service.get_banks()
+                
+                if banks:
+                    # Cache banks for performance
+                    await self._cache_banks(banks)
+                    logger.info("Retrieved %d supported banks", len(banks))
+                    return banks
+                else:
+                    logger.warning("No banks returned from transfer service")
+                    return None
                 
         except Exception as e:
-            logger.error(f"Failed to get supported banks: {e}")
-            # Try to return cached banks as fallback
-            return await self._get_cached_banks()
+            logger.error("Failed to get supported banks: %s", e)
+            # Fall back to the last fetched list even if it has expired
+            return await self._get_cached_banks(allow_stale=True)
+    
+    async def _keep_banks_warm(self) -> None:
+        """Prefetch the bank list at startup and refresh it before it expires"""
+        await self._dependencies_ready.wait()
+        while True:
+            try:
+                async with self._banks_lock:
+                    # TransferService keeps its own longer-lived copy; drop it so the refresh reaches Monnify
+                    self.transfer_service.invalidate_banks_cache()
+                    async with self._monnify_semaphore:
+                        banks = await self.transfer_service.get_banks()
+                    if banks:
+                        await self._cache_banks(banks)
+            except Exception as e:
+                logger.warning("Bank list refresh failed: %s", e)
+            await asyncio.sleep(self.BANKS_CACHE_TTL * self.BANKS_REFRESH_FRACTION)
     
     async def validate_bank_account(self, account_number: str, bank_code: str) -> Optional[Dict[str, Any]]:
         """Validate bank account with the bank"""
+        # Basic validation first
+        if not self._is_valid_account_number(account_number):
+            return None
+        
+        # Concurrent requests for the same account share one Monnify lookup
+        key = (account_number, bank_code)
+        task = self._validate_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._validate_with_provider(account_number, bank_code))
+            self._validate_inflight[key] = task
+            task.add_done_callback(lambda _: self._validate_inflight.pop(key, None))
+        
+        # Shield so one cancelled caller doesn't cancel the lookup for the others
+        return await asyncio.shield(task)
+    
+    async def _validate_with_provider(self, account_number: str, bank_code: str) -> Optional[Dict[str, Any]]:
+        """Validate a well-formed account number with Monnify"""
         try:
-            # Basic validation first
-            if not self._is_valid_account_number(account_number):
-                return None
-            
             if not self.transfer_service:
                 raise ValueError("Transfer service not initialized")
             
             # Validate with Monnify
-            validation_result = await self.transfer_service.validate_bank_account(
-                account_number, bank_code
-            )
+            async with self._monnify_semaphore:
+                validation_result = await self.transfer_service.validate_bank_account(
+                    account_number, bank_code
+                )
             
             if validation_result and validation_result.get("requestSuccessful"):
                 account_info = {
@@ -78,14 +182,14 @@ class BankService(BaseService):
                     "is_valid": True
                 }
                 
-                logger.info(f"Successfully validated account {account_number[-4:]}*** with bank {bank_code}")
+                logger.info("Successfully validated account %s*** with bank %s", account_number[-4:], bank_code)
                 return account_info
             else:
-                logger.warning(f"Account validation failed for {account_number[-4:]}*** with bank {bank_code}")
+                logger.warning("Account validation failed for %s*** with bank %s", account_number[-4:], bank_code)
                 return None
                 
         except Exception as e:
-            logger.error(f"Error validating bank account: {e}")
+            logger.error("Error validating bank account: %s", e)
             return None
     
     async def save_user_bank_details(self, user_id: int, bank_info: Dict[str, Any]) -> bool:
@@ -95,25 +199,27 @@ class BankService(BaseService):
                 raise ValueError("Database service not initialized")
             
             # Validate required fields
-            required_fields = ['account_number', 'bank_code', 'account_name']
-            if not all(field in bank_info for field in required_fields):
-                logger.error(f"Missing required bank info fields: {required_fields}")
+            missing_fields = _REQUIRED_BANK_FIELDS.difference(bank_info)
+            if missing_fields:
+                logger.error("Missing required bank info fields: %s", sorted(missing_fields))
                 return False
             
             # Add metadata
             bank_info['user_id'] = user_id
-            bank_info['created_at'] = datetime.now().isoformat()
-            bank_info['updated_at'] = datetime.now().isoformat()
+            now_iso = datetime.now().isoformat()
+            bank_info['created_at'] = now_iso
+            bank_info['updated_at'] = now_iso
             bank_info['is_active'] = True
             
             # Save to database
             success = await self.db_service.set_user_bank_details(user_id, bank_info)
+            self._user_bank_cache.pop(user_id, None)
             
             if success:
-                logger.info(f"Saved bank details for user {user_id}")
+                logger.info("Saved bank details for user %s", user_id)
                 
                 # Log security event
-                await self._log_security_event(
+                self._log_security_event(
                     "BANK_DETAILS_SAVED",
                     user_id,
                     {
@@ -124,11 +230,11 @@ class BankService(BaseService):
                 
                 return True
             else:
-                logger.error(f"Failed to save bank details for user {user_id}")
+                logger.error("Failed to save bank details for user %s", user_id)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error saving bank details for user {user_id}: {e}")
+            logger.error("Error saving bank details for user %s: %s", user_id, e)
             return False
     
     async def get_user_bank_details(self, user_id: int) -> Optional[Dict[str, Any]]:
@@ -137,69 +243,86 @@ class BankService(BaseService):
             if not self.db_service:
                 raise ValueError("Database service not initialized")
             
+            cached = self._user_bank_cache.get(user_id)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self._user_bank_cache.move_to_end(user_id)
+                    return cached[1]
+                del self._user_bank_cache[user_id]
+            
             bank_details = await self.db_service.get_user_bank_details(user_id)
             
             if bank_details:
                 # Don't log full account details for security
-                logger.info(f"Retrieved bank details for user {user_id}")
+                logger.info("Retrieved bank details for user %s", user_id)
+                self._user_bank_cache[user_id] = (time.monotonic() + self.USER_BANK_CACHE_TTL, bank_details)
+                if len(self._user_bank_cache) > self._user_bank_cache_max:
+                    self._user_bank_cache.popitem(last=False)
                 return bank_details
             else:
-                logger.info(f"No bank details found for user {user_id}")
+                logger.info("No bank details found for user %s", user_id)
                 return None
                 
         except Exception as e:
-            logger.error(f"Error getting bank details for user {user_id}: {e}")
+            logger.error("Error getting bank details for user %s: %s", user_id, e)
             return None
     
+    def invalidate_user_bank_details(self, user_id: int) -> None:
+        """Forget cached bank details for a user whose record was written elsewhere"""
+        self._user_bank_cache.pop(user_id, None)
+    
     async def update_user_bank_details(self, user_id: int, updates: Dict[str, Any]) -> bool:
         """Update user's bank details"""
         try:
             if not self.db_service:
                 raise ValueError("Database service not initialized")
             
-            # Get existing details
-            existing_details = await self.get_user_bank_details(user_id)
-            if not existing_details:
-                logger.error(f"No existing bank details found for user {user_id}")
-                return False
+            patch = dict(updates)
             
-            # Merge updates
-            updated_details = {**existing_details, **updates}
-            updated_details['updated_at'] = datetime.now().isoformat()
+            # Keys outside the database whitelist are ignored there, so a patch of only those changes nothing
+            if not any(column in patch for column in self.db_service.BANK_DETAIL_COLUMNS):
+                logger.warning("No updatable bank detail fields in update for user %s: %s", user_id, sorted(patch))
+                return False
             
-            # If account details changed, revalidate
+            # If account details changed, revalidate against the stored values
             if 'account_number' in updates or 'bank_code' in updates:
+                existing_details = await self.get_user_bank_details(user_id)
+                if not existing_details:
+                    logger.error("No existing bank details found for user %s", user_id)
+                    return False
+                
                 validation_result = await self.validate_bank_account(
-                    updated_details['account_number'],
-                    updated_details['bank_code']
+                    updates.get('account_number', existing_details['account_number']),
+                    updates.get('bank_code', existing_details['bank_code'])
                 )
                 
                 if not validation_result:
-                    logger.error(f"Updated bank details validation failed for user {user_id}")
+                    logger.error("Updated bank details validation failed for user %s", user_id)
                     return False
                 
-                updated_details['account_name'] = validation_result['account_name']
+                patch['account_name'] = validation_result['account_name']
             
-            # Save updated details
-            success = await self.db_service.set_user_bank_details(user_id, updated_details)
+            # Merge in the database so the update is one atomic round trip
+            success = await self.db_service.patch_user_bank_details(user_id, patch)
+            self._user_bank_cache.pop(user_id, None)
             
             if success:
-                logger.info(f"Updated bank details for user {user_id}")
+                logger.info("Updated bank details for user %s", user_id)
                 
                 # Log security event
-                await self._log_security_event(
+                self._log_security_event(
                     "BANK_DETAILS_UPDATED",
                     user_id,
-                    {"updated_fields": list(updates.keys())}
+                    {"updated_fields": [column for column in self.db_service.BANK_DETAIL_COLUMNS if column in patch]}
                 )
                 
                 return True
             else:
-                logger.error(f"Failed to update bank details for user {user_id}")
+                logger.error("Failed to update bank details for user %s", user_id)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error updating bank details for user {user_id}: {e}")
+            logger.error("Error updating bank details for user %s: %s", user_id, e)
             return False
     
     async def delete_user_bank_details(self, user_id: int) -> bool:
@@ -209,12 +332,13 @@ class BankService(BaseService):
                 raise ValueError("Database service not initialized")
             
             success = await self.db_service.delete_user_bank_details(user_id)
+            self._user_bank_cache.pop(user_id, None)
             
             if success:
-                logger.info(f"Deleted bank details for user {user_id}")
+                logger.info("Deleted bank details for user %s", user_id)
                 
                 # Log security event
-                await self._log_security_event(
+                self._log_security_event(
                     "BANK_DETAILS_DELETED",
                     user_id,
                     {}
@@ -222,11 +346,11 @@ class BankService(BaseService):
                 
                 return True
             else:
-                logger.error(f"Failed to delete bank details for user {user_id}")
+                logger.error("Failed to delete bank details for user %s", user_id)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error deleting bank details for user {user_id}: {e}")
+            logger.error("Error deleting bank details for user %s: %s", user_id, e)
             return False
     
     async def get_bank_by_code(self, bank_code: str) -> Optional[Dict[str, Any]]:
@@ -236,97 +360,102 @@ class BankService(BaseService):
             if not banks:
                 return None
             
-            for bank in banks:
-                if bank.get('code') == bank_code:
-                    return bank
+            bank = self._cached_banks['by_code'].get(bank_code)
+            if bank:
+                return bank
             
-            logger.warning(f"Bank not found for code: {bank_code}")
+            logger.warning("Bank not found for code: %s", bank_code)
             return None
             
         except Exception as e:
-            logger.error(f"Error getting bank by code {bank_code}: {e}")
+            logger.error("Error getting bank by code %s: %s", bank_code, e)
             return None
     
-    async def search_banks(self, query: str) -> List[Dict[str, Any]]:
-        """Search banks by name"""
+    async def search_banks(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Search banks by name, returning at most limit matches"""
         try:
             banks = await self.get_supported_banks()
             if not banks:
                 return []
             
-            query = query.lower().strip()
-            matching_banks = []
+            query = query.casefold().strip()
+            if not query:
+                return list(banks[:limit])
             
-            for bank in banks:
-                bank_name = bank.get('name', '').lower()
+            matching_banks = []
+            # Bound once so the loop body avoids repeated attribute lookups
+            append = matching_banks.append
+            for bank_name, bank in self._cached_banks['folded_names']:
                 if query in bank_name:
-                    matching_banks.append(bank)
+                    append(bank)
+                    if len(matching_banks) == limit:
+                        break
             
-            logger.info(f"Found {len(matching_banks)} banks matching query: {query}")
+            logger.info("Found %d banks matching query: %s", len(matching_banks), query)
             return matching_banks
             
         except Exception as e:
-            logger.error(f"Error searching banks with query {query}: {e}")
+            logger.error("Error searching banks with query %s: %s", query, e)
             return []
     
     def _is_valid_account_number(self, account_number: str) -> bool:
         """Validate account number format"""
-        try:
-            # Basic Nigerian account number validation
-            if not account_number.isdigit():
-                return False
-            
-            if len(account_number) != 10:
-                return False
-            
-            return True
-            
-        except Exception:
-            return False
+        # Basic Nigerian account number validation; length first since it's constant time
+        return isinstance(account_number, str) and len(account_number) == 10 and account_number.isdigit()
     
     def _hash_account_number(self, account_number: str) -> str:
         """Create a hash of account number for logging (security)"""
-        import hashlib
-        return hashlib.sha256(account_number.encode()).hexdigest()[:16]
+        return hashlib.blake2b(account_number.encode(), digest_size=8, key=self._log_hash_key).hexdigest()
     
     async def _cache_banks(self, banks: List[Dict[str, Any]]) -> None:
         """Cache banks list for performance"""
         try:
             # Simple in-memory cache for now
             # In production, this could use Redis or similar
+            # Lookup indexes are built once per fetch instead of on every query
             self._cached_banks = {
                 "data": banks,
-                "cached_at": datetime.now(),
-                "expires_at": datetime.now().timestamp() + 3600  # 1 hour
+                "by_code": {bank.get('code'): bank for bank in banks},
+                "folded_names": [(bank['name'].casefold(), bank) for bank in banks if bank.get('name')],
+                "expires_at": time.monotonic() + self.BANKS_CACHE_TTL
             }
             
         except Exception as e:
-            logger.error(f"Error caching banks: {e}")
+            logger.error("Error caching banks: %s", e)
     
-    async def _get_cached_banks(self) -> Optional[List[Dict[str, Any]]]:
+    async def _get_cached_banks(self, allow_stale: bool = False) -> Optional[List[Dict[str, Any]]]:
         """Get cached banks if available and not expired"""
-        try:
-            if not hasattr(self, '_cached_banks'):
-                return None
-            
-            cache = self._cached_banks
-            if datetime.now().timestamp() > cache['expires_at']:
-                return None
-            
-            return cache['data']
-            
-        except Exception as e:
-            logger.error(f"Error getting cached banks: {e}")
+        cache = self._cached_banks
+        if cache is None or (not allow_stale and time.monotonic() > cache['expires_at']):
             return None
+        
+        return cache['data']
     
-    async def _log_security_event(self, event_type: str, user_id: int, details: Dict[str, Any]) -> None:
-        """Log security events"""
+    def _log_security_event(self, event_type: str, user_id: int, details: Dict[str, Any]) -> None:
+        """Queue a security event for the background writer"""
+        event = (event_type, user_id, details)
         try:
-            # This would integrate with your security logging system
-            logger.info(f"SECURITY_EVENT: {event_type} for user {user_id} - {details}")
-            
-        except Exception as e:
-            logger.error(f"Error logging security event: {e}")
+            self._security_queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Keep the newest events; the oldest one is dropped
+            self._security_queue.get_nowait()
+            self._security_queue.task_done()
+            self._security_queue.put_nowait(event)
+    
+    async def _drain_security_events(self) -> None:
+        """Write queued security events to the log and the security audit table"""
+        queue = self._security_queue
+        info = logger.info
+        while True:
+            event_type, user_id, details = await queue.get()
+            try:
+                info("SECURITY_EVENT: %s for user %s - %s", event_type, user_id, details)
+                if self.db_service:
+                    await self.db_service.log_security_event(user_id, event_type, details)
+            except Exception as e:
+                logger.error("Error logging security event: %s", e)
+            finally:
+                queue.task_done()
     
     def get_health_status(self) -> Dict[str, Any]:
         """Get service health status"""
@@ -337,6 +466,8 @@ class BankService(BaseService):
                 "transfer_service": self.transfer_service is not None,
                 "db_service": self.db_service is not None
             },
-            "cached_banks": hasattr(self, '_cached_banks'),
+            "cached_banks": self._cached_banks is not None,
+            "monnify_slots_available": self._monnify_semaphore._value,
+            "monnify_concurrency": self.monnify_concurrency,
             "timestamp": datetime.now().isoformat()
         }
@@ -5,10 +5,10 @@ Manages service lifecycle, dependencies, and inter-service communication.
 
 import asyncio
 import logging
+import time
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, Type, TypeVar, List
-from datetime import datetime, timedelta
-import weakref
+from datetime import datetime, timedelta, timezone
 from contextlib import asynccontextmanager
 
 logger = logging.getLogger(__name__)
@@ -18,38 +18,41 @@ T = TypeVar('T', bound='BaseService')
 class ServiceHealth:
     """Service health status tracking."""
     
+    __slots__ = ('service_name', 'is_healthy', 'last_check_wall', 'error_count', 'last_error', '_uptime_start_mono')
+    
     def __init__(self, service_name: str):
         self.service_name = service_name
         self.is_healthy = True
-        self.last_check = datetime.utcnow()
+        # Epoch seconds; only turned into a datetime when the status is reported
+        self.last_check_wall = time.time()
         self.error_count = 0
         self.last_error: Optional[str] = None
-        self.uptime_start = datetime.utcnow()
+        self._uptime_start_mono = time.monotonic()
     
     def mark_healthy(self):
         """Mark service as healthy."""
         self.is_healthy = True
-        self.last_check = datetime.utcnow()
+        self.last_check_wall = time.time()
         self.error_count = 0
         self.last_error = None
     
     def mark_unhealthy(self, error: str):
         """Mark service as unhealthy."""
         self.is_healthy = False
-        self.last_check = datetime.utcnow()
+        self.last_check_wall = time.time()
         self.error_count += 1
         self.last_error = error
     
     def get_uptime(self) -> timedelta:
         """Get service uptime."""
-        return datetime.utcnow() - self.uptime_start
+        return timedelta(seconds=time.monotonic() - self._uptime_start_mono)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert health status to dictionary."""
         return {
             "service_name": self.service_name,
             "is_healthy": self.is_healthy,
-            "last_check": self.last_check.isoformat(),
+            "last_check": datetime.fromtimestamp(self.last_check_wall, timezone.utc).isoformat(),
             "error_count": self.error_count,
             "last_error": self.last_error,
             "uptime_seconds": self.get_uptime().total_seconds()
@@ -88,14 +91,14 @@ class BaseService(ABC):
             return
         
         try:
-            self.logger.info(f"Starting service: {self.service_name}")
+            self.logger.info("Starting service: %s", self.service_name)
             await self.initialize()
             self._initialized = True
             self.health.mark_healthy()
-            self.logger.info(f"Service started successfully: {self.service_name}")
+            self.logger.info("Service started successfully: %s", self.service_name)
         except Exception as e:
             self.health.mark_unhealthy(str(e))
-            self.logger.error(f"Failed to start service {self.service_name}: {e}")
+            self.logger.error("Failed to start service %s: %s", self.service_name, e)
             raise
     
     async def stop(self) -> None:
@@ -104,18 +107,18 @@ class BaseService(ABC):
             return
         
         try:
-            self.logger.info(f"Stopping service: {self.service_name}")
+            self.logger.info("Stopping service: %s", self.service_name)
             await self.shutdown()
             self._shutdown = True
-            self.logger.info(f"Service stopped successfully: {self.service_name}")
+            self.logger.info("Service stopped successfully: %s", self.service_name)
         except Exception as e:
-            self.logger.error(f"Error stopping service {self.service_name}: {e}")
+            self.logger.error("Error stopping service %s: %s", self.service_name, e)
             raise
     
     def add_dependency(self, dependency_name: str, service: 'BaseService') -> None:
         """Add a service dependency."""
         self._dependencies[dependency_name] = service
-        self.logger.debug(f"Added dependency: {dependency_name} to {self.service_name}")
+        self.logger.debug("Added dependency: %s to %s", dependency_name, self.service_name)
     
     def get_dependency(self, dependency_name: str) -> Optional['BaseService']:
         """Get a service dependency."""
@@ -131,7 +134,7 @@ class BaseService(ABC):
                 self.health.mark_unhealthy("Health check failed")
         except Exception as e:
             self.health.mark_unhealthy(f"Health check error: {str(e)}")
-            self.logger.error(f"Health check failed for {self.service_name}: {e}")
+            self.logger.error("Health check failed for %s: %s", self.service_name, e)
 
 class ServiceRegistry:
     """Registry for managing all microservices."""
@@ -146,7 +149,7 @@ class ServiceRegistry:
     def register_service_type(self, service_name: str, service_class: Type[BaseService]) -> None:
         """Register a service type."""
         self._service_types[service_name] = service_class
-        logger.info(f"Registered service type: {service_name}")
+        logger.info("Registered service type: %s", service_name)
     
     def create_service(self, service_name: str, config: Dict[str, Any]) -> BaseService:
         """Create a service instance."""
@@ -157,7 +160,7 @@ class ServiceRegistry:
         service = service_class(service_name, config)
         self._services[service_name] = service
         
-        logger.info(f"Created service instance: {service_name}")
+        logger.info("Created service instance: %s", service_name)
         return service
     
     def get_service(self, service_name: str) -> Optional[BaseService]:
@@ -175,12 +178,12 @@ class ServiceRegistry:
             raise ValueError(f"Dependency service not found: {dependency_name}")
         
         service.add_dependency(dependency_name, dependency)
-        logger.info(f"Added dependency: {service_name} -> {dependency_name}")
+        logger.info("Added dependency: %s -> %s", service_name, dependency_name)
     
     def set_startup_order(self, order: List[str]) -> None:
         """Set the order in which services should be started."""
         self._startup_order = order
-        logger.info(f"Set startup order: {' -> '.join(order)}")
+        logger.info("Set startup order: %s", ' -> '.join(order))
     
     async def start_all_services(self) -> None:
         """Start all services in the correct order."""
@@ -191,7 +194,7 @@ class ServiceRegistry:
             if service:
                 await service.start()
             else:
-                logger.warning(f"Service not found in startup order: {service_name}")
+                logger.warning("Service not found in startup order: %s", service_name)
         
         # Start health check monitoring
         await self._start_health_monitoring()
@@ -215,19 +218,20 @@ class ServiceRegistry:
     async def _start_health_monitoring(self) -> None:
         """Start periodic health checks for all services."""
         async def health_monitor():
+            # Loop-invariant lookups are bound once rather than on every tick
+            sleep, gather = asyncio.sleep, asyncio.gather
+            services = self._services
             while True:
                 try:
-                    await asyncio.sleep(self._health_check_interval)
-                    tasks = []
-                    for service in self._services.values():
-                        tasks.append(service.perform_health_check())
+                    await sleep(self._health_check_interval)
+                    tasks = [service.perform_health_check() for service in services.values()]
                     
                     if tasks:
-                        await asyncio.gather(*tasks, return_exceptions=True)
+                        await gather(*tasks, return_exceptions=True)
                 except asyncio.CancelledError:
                     break
                 except Exception as e:
-                    logger.error(f"Health monitoring error: {e}")
+                    logger.error("Health monitoring error: %s", e)
         
         self._health_check_task = asyncio.create_task(health_monitor())
         logger.info("Started health monitoring")
@@ -1,11 +1,13 @@
 """
 Budget Management Service - Handles user budget operations
 """
+import json
 import logging
 from typing import Optional, Dict, Any, List
 from decimal import Decimal
 from datetime import datetime, date
 from dataclasses import dataclass
+import redis.asyncio as redis
 from .base_service import BaseService
 
 logger = logging.getLogger(__name__)
@@ -64,6 +66,13 @@ class BudgetService(BaseService):
             "critical": 95.0,
             "over_budget": 100.0
         }
+        self.redis_config = self.config.get("redis")
+        
+        # Redis client for cache-aside budget reads
+        self.redis_client: Optional[redis.Redis] = None
+        
+        # Short TTL bounds how stale spent_amount can get after a transaction
+        self.budget_cache_ttl = 120  # 2 minutes
     
     async def initialize(self) -> bool:
         """Initialize the budget service"""
@@ -76,6 +85,18 @@ class BudgetService(BaseService):
             # Create budget-related tables if they don't exist
             await self._create_budget_tables()
             
+            if self.redis_config:
+                try:
+                    self.redis_client = redis.from_url(
+                        self.redis_config.url,
+                        max_connections=self.redis_config.max_connections,
+                        decode_responses=self.redis_config.decode_responses
+                    )
+                    await self.redis_client.ping()
+                except Exception as e:
+                    logger.warning(f"Redis connection failed: {e}. Running without budget cache.")
+                    self.redis_client = None
+            
             logger.info("Budget service initialized successfully")
             return True
             
@@ -83,6 +104,12 @@ class BudgetService(BaseService):
             logger.error(f"Failed to initialize budget service: {e}")
             return False
     
+    async def shutdown(self) -> None:
+        """Shutdown the budget service"""
+        if self.redis_client:
+            await self.redis_client.close()
+        logger.info("Budget service shutdown complete")
+    
     async def _create_budget_tables(self):
         """Create budget-related database tables"""
         budget_table_sql = """
@@ -120,9 +147,16 @@ class BudgetService(BaseService):
         );
         """
         
+        # Covers the monthly spend and analytics scans without touching the table
+        spending_index_sql = """
+        CREATE INDEX IF NOT EXISTS idx_tx_user_type_date
+        ON transactions (user_id, transaction_type, created_at, amount);
+        """
+        
         await self.db.execute_query(budget_table_sql)
         await self.db.execute_query(budget_alerts_sql)
         await self.db.execute_query(budget_history_sql)
+        await self.db.execute_query(spending_index_sql)
     
     async def set_budget(self, user_id: int, amount: Decimal, period: str = "monthly") -> bool:
         """Set user budget with validation and history tracking"""
@@ -135,7 +169,7 @@ class BudgetService(BaseService):
                 raise ValueError("Invalid budget period")
             
             # Get current budget for history
-            current_budget_info = await self.get_budget_info(user_id)
+            current_budget_info = await self.get_budget_info(user_id, use_cache=False)
             old_budget = current_budget_info.current_budget if current_budget_info else Decimal('0.00')
             
             # Update budget
@@ -150,6 +184,8 @@ class BudgetService(BaseService):
             )
             
             if success:
+                await self._invalidate_budget_cache(user_id)
+                
                 # Record budget change history
                 await self._record_budget_history(user_id, old_budget, amount, "budget_update")
                 
@@ -166,35 +202,40 @@ class BudgetService(BaseService):
             logger.error(f"Error setting budget for user {user_id}: {e}")
             return False
     
-    async def get_budget_info(self, user_id: int) -> Optional[BudgetInfo]:
+    async def get_budget_info(self, user_id: int, use_cache: bool = True) -> Optional[BudgetInfo]:
         """Get comprehensive budget information for user"""
         try:
-            # Get budget info
+            if use_cache and self.redis_client:
+                cached_info = await self._get_cached_budget_info(user_id)
+                if cached_info:
+                    return cached_info
+            
+            # Budget row and this month's spending in one round trip.
+            # SQLite dialect like the rest of this service; on Postgres the month bounds would be
+            # date_trunc('month', now()) and date_trunc('month', now()) + interval '1 month'
             budget_query = """
-            SELECT current_budget, budget_period, updated_at
-            FROM user_budgets 
-            WHERE user_id = ?
+            SELECT ub.current_budget, ub.budget_period, ub.updated_at,
+                   COALESCE((
+                       SELECT SUM(t.amount)
+                       FROM transactions t
+                       WHERE t.user_id = ub.user_id AND t.transaction_type = 'debit'
+                       AND t.created_at >= date('now', 'start of month')
+                       AND t.created_at < date('now', 'start of month', '+1 month')
+                   ), 0) as spent_amount
+            FROM user_budgets ub
+            WHERE ub.user_id = ?
             """
             
             budget_result = await self.db.fetch_one(budget_query, (user_id,))
             if not budget_result:
                 return None
             
-            # Get spent amount from transactions
-            spent_query = """
-            SELECT COALESCE(SUM(amount), 0) as spent_amount
-            FROM transactions 
-            WHERE user_id = ? AND transaction_type = 'debit' 
-            AND strftime('%Y-%m', created_at) = strftime('%Y-%m', 'now')
-            """
-            
-            spent_result = await self.db.fetch_one(spent_query, (user_id,))
-            spent_amount = Decimal(str(spent_result['spent_amount'] if spent_result else 0))
+            spent_amount = Decimal(str(budget_result['spent_amount']))
             
             current_budget = Decimal(str(budget_result['current_budget']))
             remaining_budget = current_budget - spent_amount
             
-            return BudgetInfo(
+            budget_info = BudgetInfo(
                 user_id=user_id,
                 current_budget=current_budget,
                 spent_amount=spent_amount,
@@ -203,6 +244,11 @@ class BudgetService(BaseService):
                 budget_period=budget_result['budget_period']
             )
             
+            if self.redis_client:
+                await self._cache_budget_info(budget_info)
+            
+            return budget_info
+            
         except Exception as e:
             logger.error(f"Error getting budget info for user {user_id}: {e}")
             return None
@@ -210,7 +256,8 @@ class BudgetService(BaseService):
     async def check_budget_alerts(self, user_id: int) -> List[BudgetAlert]:
         """Check if budget alerts should be triggered"""
         try:
-            budget_info = await self.get_budget_info(user_id)
+            # Spending is written outside this service, so a cached spent_amount could miss a threshold
+            budget_info = await self.get_budget_info(user_id, use_cache=False)
             if not budget_info:
                 return []
             
@@ -322,25 +369,78 @@ class BudgetService(BaseService):
             VALUES (?, ?, ?, ?)
             """
             
-            return await self.db.execute_query(
+            recorded = await self.db.execute_query(
                 query, 
                 (user_id, float(old_budget), float(new_budget), reason)
             )
+            await self._invalidate_budget_cache(user_id)
+            return recorded
             
         except Exception as e:
             logger.error(f"Error recording budget history: {e}")
             return False
     
+    @staticmethod
+    def _budget_cache_key(user_id: int) -> str:
+        """Redis key for a user's cached budget info"""
+        return f"v1:budget:info:{user_id}"
+    
+    async def _cache_budget_info(self, budget_info: BudgetInfo) -> None:
+        """Cache budget info in Redis"""
+        try:
+            await self.redis_client.setex(
+                self._budget_cache_key(budget_info.user_id),
+                self.budget_cache_ttl,
+                json.dumps(budget_info.__dict__, default=str)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache budget info for user {budget_info.user_id}: {e}")
+    
+    async def _get_cached_budget_info(self, user_id: int) -> Optional[BudgetInfo]:
+        """Get cached budget info from Redis"""
+        try:
+            cached_data = await self.redis_client.get(self._budget_cache_key(user_id))
+            if not cached_data:
+                return None
+            
+            data = json.loads(cached_data)
+            last_updated = data['last_updated']
+            try:
+                last_updated = datetime.fromisoformat(last_updated)
+            except (TypeError, ValueError):
+                pass
+            
+            return BudgetInfo(
+                user_id=user_id,
+                current_budget=Decimal(data['current_budget']),
+                spent_amount=Decimal(data['spent_amount']),
+                remaining_budget=Decimal(data['remaining_budget']),
+                last_updated=last_updated,
+                budget_period=data['budget_period']
+            )
+        except Exception as e:
+            logger.warning(f"Failed to get cached budget info for user {user_id}: {e}")
+        return None
+    
+    async def _invalidate_budget_cache(self, user_id: int) -> None:
+        """Drop a user's cached budget info"""
+        if not self.redis_client:
+            return
+        try:
+            await self.redis_client.delete(self._budget_cache_key(user_id))
+        except Exception as e:
+            logger.warning(f"Failed to invalidate budget cache for user {user_id}: {e}")
+    
     async def _create_default_alerts(self, user_id: int) -> bool:
         """Create default budget alerts for new user"""
         try:
-            for alert_type, threshold in self.alert_thresholds.items():
-                query = """
-                INSERT INTO budget_alerts (user_id, alert_type, alert_threshold, is_enabled)
-                VALUES (?, ?, ?, 1)
-                """
-                
-                await self.db.execute_query(query, (user_id, alert_type, threshold))
+            query = """
+            INSERT INTO budget_alerts (user_id, alert_type, alert_threshold, is_enabled)
+            VALUES (?, ?, ?, 1)
+            """
+            
+            rows = [(user_id, alert_type, threshold) for alert_type, threshold in self.alert_thresholds.items()]
+            await self.db.execute_many(query, rows)
             
             return True
             
@@ -14,8 +14,10 @@ from services.base_service import BaseService, service
 class DatabaseConfig:
     url: str
     pool_size: int = 10
+    pool_min_size: int = 5
     max_overflow: int = 20
     pool_timeout: int = 30
+    command_timeout: int = 60
 
 @dataclass
 class KorapayConfig:
@@ -36,12 +38,21 @@ class TelegramConfig:
     bot_token: str
     webhook_url: Optional[str] = None
 
+@dataclass
+class RedisConfig:
+    url: str
+    max_connections: int = 20
+    decode_responses: bool = True
+
 @dataclass
 class AppConfig:
     database: DatabaseConfig
     korapay: KorapayConfig
     monnify: MonnifyConfig
     telegram: TelegramConfig
+    account_hash_key: Optional[str] = None
+    redis: Optional[RedisConfig] = None
+    scheduled_jobs_enabled: bool = False
     debug: bool = False
     port: int = 10000
 
@@ -49,6 +60,9 @@ class AppConfig:
 class ConfigManager(BaseService):
     """Manages application configuration and environment variables"""
     
+    # Environment-derived config, parsed once per process and shared by every instance
+    _process_config: Optional[AppConfig] = None
+    
     def __init__(self, service_name: str = "config", config: Dict[str, Any] = None):
         super().__init__(service_name, config or {})
         load_dotenv()
@@ -57,13 +71,19 @@ class ConfigManager(BaseService):
     async def initialize(self) -> bool:
         """Initialize configuration from environment variables"""
         try:
-            self._config = self._load_config()
+            self._config = self._get_process_config()
             self.logger.info("Configuration loaded successfully")
             return True
         except Exception as e:
             self.logger.error(f"Failed to load configuration: {e}")
             return False
     
+    def _get_process_config(self) -> AppConfig:
+        """Return the process-wide configuration, loading it on first use"""
+        if ConfigManager._process_config is None:
+            ConfigManager._process_config = self._load_config()
+        return ConfigManager._process_config
+    
     def _load_config(self) -> AppConfig:
         """Load configuration from environment variables"""
         # Database configuration
@@ -80,8 +100,10 @@ class ConfigManager(BaseService):
         database_config = DatabaseConfig(
             url=database_url,
             pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            pool_min_size=int(os.getenv("DB_POOL_MIN_SIZE", "5")),
             max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
-            pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30"))
+            pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+            command_timeout=int(os.getenv("DB_COMMAND_TIMEOUT", "60"))
         )
         
         # Korapay configuration
@@ -106,10 +128,23 @@ class ConfigManager(BaseService):
             webhook_url=os.getenv("TELEGRAM_WEBHOOK_URL")
         )
         
+        # Redis is optional; services run without their caches when REDIS_URL is unset
+        redis_url = os.getenv("REDIS_URL")
+        redis_config = RedisConfig(
+            url=redis_url,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "20")),
+            decode_responses=os.getenv("REDIS_DECODE_RESPONSES", "true").lower() == "true"
+        ) if redis_url else None
+        
         return AppConfig(            database=database_config,
             korapay=korapay_config,
             monnify=monnify_config,
             telegram=telegram_config,
+            # Secret that keys account number hashes in logs; BankService falls back to a per-process key
+            account_hash_key=os.getenv("ACCOUNT_HASH_KEY"),
+            redis=redis_config,
+            # The daily jobs debit wallets and send bank transfers, so they only run when asked for
+            scheduled_jobs_enabled=os.getenv("ENABLE_SCHEDULED_JOBS", "false").lower() == "true",
             debug=os.getenv("DEBUG", "false").lower() == "true",
             port=int(os.getenv("PORT", "10000"))
         )
@@ -131,14 +166,16 @@ class ConfigManager(BaseService):
     def get_config(self) -> Dict[str, Any]:
         """Get configuration as dictionary for compatibility"""
         if not self._config:
-            raise RuntimeError("Configuration not initialized. Call initialize() first.")
+            self._config = self._get_process_config()
         
         return {
             "database": {
                 "url": self._config.database.url,
                 "pool_size": self._config.database.pool_size,
+                "pool_min_size": self._config.database.pool_min_size,
                 "max_overflow": self._config.database.max_overflow,
-                "pool_timeout": self._config.database.pool_timeout
+                "pool_timeout": self._config.database.pool_timeout,
+                "command_timeout": self._config.database.command_timeout
             },
             "korapay": {
                 "public_key": self._config.korapay.public_key,
@@ -156,6 +193,10 @@ class ConfigManager(BaseService):
                 "bot_token": self._config.telegram.bot_token,
                 "webhook_url": self._config.telegram.webhook_url
             },
+            "account_hash_key": self._config.account_hash_key,
+            # Passed as the dataclass; the user and budget services read its attributes
+            "redis": self._config.redis,
+            "scheduled_jobs_enabled": self._config.scheduled_jobs_enabled,
             "debug": self._config.debug,
             "port": self._config.port
         }
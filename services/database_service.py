@@ -5,7 +5,9 @@ Provides a robust data access layer for all microservices.
 
 import asyncio
 import logging
-from typing import Dict, Any, Optional, List, Union, AsyncGenerator
+import os
+import time
+from typing import Dict, Any, Optional, List, Tuple, Union, AsyncGenerator
 from contextlib import asynccontextmanager
 import asyncpg
 from asyncpg import Pool, Connection
@@ -17,6 +19,9 @@ from services.base_service import BaseService, service
 
 logger = logging.getLogger(__name__)
 
+# Food catalogue loaded into an empty food_items table at startup
+FOOD_DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'food_data.json')
+
 class DatabaseError(Exception):
     """Custom database error."""
     pass
@@ -29,10 +34,22 @@ class TransactionError(DatabaseError):
 class DatabaseService(BaseService):
     """Enhanced database service with connection pooling and monitoring."""
     
+    # Seconds a fetched food catalogue is reused before it is read again
+    FOOD_ITEMS_TTL = 300
+    # Advisory lock key held while a daily allowance deduction runs
+    ALLOWANCE_LOCK_KEY = 0x4443_0001
+    # Columns of user_bank_details that patch_user_bank_details may change
+    BANK_DETAIL_COLUMNS = ("account_number", "bank_code", "bank_name", "account_name", "is_verified")
+    
     def __init__(self, service_name: str, config: Dict[str, Any]):
         super().__init__(service_name, config)
         self.pool: Optional[Pool] = None
         self.db_config = config.get("database")
+        # Seconds to wait for a free pooled connection before failing the query
+        self.acquire_timeout = self.db_config.get("pool_timeout", 30)
+        # Seconds allowed for each new pooled connection to be established
+        self.connect_timeout = self.db_config.get("connect_timeout", 5)
+        self._food_items_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
         self._connection_stats = {
             "total_connections": 0,
             "active_connections": 0,
@@ -45,10 +62,13 @@ class DatabaseService(BaseService):
         try:
             self.pool = await asyncpg.create_pool(
                 dsn=self.db_config["url"],
-                min_size=5,
+                # Bounds every connect, so an unreachable database fails startup instead of stalling it
+                timeout=self.connect_timeout,
+                # Keep at least the configured floor warm, never more than the ceiling
+                min_size=min(self.db_config.get("pool_min_size", 5), self.db_config["pool_size"]),
                 max_size=self.db_config["pool_size"],
                 max_inactive_connection_lifetime=300,
-                command_timeout=60,
+                command_timeout=self.db_config.get("command_timeout", 60),
                 server_settings={
                     'application_name': 'dailychow_bot',
                     'timezone': 'UTC'
@@ -57,6 +77,7 @@ class DatabaseService(BaseService):
             
             # Initialize database schema
             await self._initialize_schema()
+            await self.load_food_items_from_json(FOOD_DATA_PATH)
             self.logger.info("Database service initialized successfully")
             
         except Exception as e:
@@ -72,7 +93,7 @@ class DatabaseService(BaseService):
     async def health_check(self) -> bool:
         """Check database connectivity."""
         try:
-            async with self.pool.acquire() as conn:
+            async with self.pool.acquire(timeout=self.acquire_timeout) as conn:
                 await conn.execute("SELECT 1")
             return True
         except Exception as e:
@@ -88,7 +109,7 @@ class DatabaseService(BaseService):
         start_time = datetime.utcnow()
         conn = None
         try:
-            conn = await self.pool.acquire()
+            conn = await self.pool.acquire(timeout=self.acquire_timeout)
             self._connection_stats["active_connections"] += 1
             yield conn
         finally:
@@ -137,6 +158,23 @@ class DatabaseService(BaseService):
             query_time = (datetime.utcnow() - start_time).total_seconds()
             self._update_query_stats(query_time)
     
+    async def execute_many(self, query: str, args_list: List[Tuple[Any, ...]]) -> None:
+        """Execute a statement once per argument tuple in a single round trip."""
+        start_time = datetime.utcnow()
+        try:
+            async with self.get_connection() as conn:
+                self._connection_stats["total_queries"] += 1
+                # asyncpg runs the whole batch atomically
+                await conn.executemany(query, args_list)
+                
+        except Exception as e:
+            self._connection_stats["failed_queries"] += 1
+            self.logger.error(f"Batch query failed: {query[:100]}... Error: {e}")
+            raise DatabaseError(f"Database batch query failed: {e}")
+        finally:
+            query_time = (datetime.utcnow() - start_time).total_seconds()
+            self._update_query_stats(query_time)
+    
     def _update_query_stats(self, query_time: float) -> None:
         """Update query performance statistics."""
         total_queries = self._connection_stats["total_queries"]
@@ -275,6 +313,8 @@ class DatabaseService(BaseService):
             "CREATE INDEX IF NOT EXISTS idx_payments_user_status ON payments(user_id, status)",
             "CREATE INDEX IF NOT EXISTS idx_payments_reference ON payments(reference)",
             "CREATE INDEX IF NOT EXISTS idx_spending_user_date ON spending_history(user_id, created_at DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_spending_allowance ON spending_history(user_id, created_at DESC) WHERE category = 'allowance'",
+            "CREATE INDEX IF NOT EXISTS idx_food_items_price ON food_items(price) WHERE availability = TRUE",
             "CREATE INDEX IF NOT EXISTS idx_security_events_user ON security_events(user_id, created_at DESC)",
             "CREATE INDEX IF NOT EXISTS idx_service_metrics_service ON service_metrics(service_name, recorded_at DESC)"
         ]
@@ -302,6 +342,16 @@ class DatabaseService(BaseService):
             return dict(row)
         return None
     
+    async def get_all_users_with_budgets(self) -> List[Dict[str, Any]]:
+        """Get every active user with a daily allowance in a single query."""
+        query = """
+        SELECT user_id, first_name, wallet_balance, daily_allowance, currency
+        FROM users WHERE is_active = TRUE AND daily_allowance > 0
+        ORDER BY user_id
+        """
+        rows = await self.execute_query(query, fetch="all")
+        return [dict(row) for row in rows]
+    
     async def create_or_update_user(self, user_id: int, user_data: Dict[str, Any]) -> None:
         """Create or update user data."""
         query = """
@@ -362,6 +412,60 @@ class DatabaseService(BaseService):
             
             return new_balance
     
+    async def deduct_daily_allowances(self, description: str = "Daily allowance") -> List[Dict[str, Any]]:
+        """Deduct today's allowance from every funded user with bank details, log it, and return those details in one statement.
+        
+        Returns an empty list when another run holds the allowance lock.
+        """
+        query = """
+        WITH deducted AS (
+            UPDATE users
+            SET wallet_balance = wallet_balance - daily_allowance, updated_at = CURRENT_TIMESTAMP
+            WHERE is_active = TRUE AND daily_allowance > 0 AND wallet_balance >= daily_allowance
+              -- Only users the allowance can actually be sent to are debited
+              AND EXISTS (SELECT 1 FROM user_bank_details b WHERE b.user_id = users.user_id)
+              -- A re-run on the same day (e.g. after a restart) must not deduct twice
+              AND NOT EXISTS (
+                  SELECT 1 FROM spending_history s
+                  WHERE s.user_id = users.user_id AND s.category = 'allowance'
+                    AND s.created_at >= CURRENT_DATE
+              )
+            RETURNING user_id, daily_allowance, currency
+        ),
+        logged AS (
+            INSERT INTO spending_history (user_id, amount, description, category, transaction_type, currency)
+            SELECT user_id, daily_allowance, $1, 'allowance', 'debit', currency FROM deducted
+            RETURNING user_id, amount, currency
+        )
+        SELECT l.user_id, l.amount, l.currency,
+               b.account_number, b.bank_code, b.bank_name, b.account_name
+        FROM logged l JOIN user_bank_details b ON b.user_id = l.user_id
+        """
+        async with self.transaction() as conn:
+            # Serialise runs across processes; the same-day guard alone races under READ COMMITTED
+            if not await conn.fetchval("SELECT pg_try_advisory_xact_lock($1)", self.ALLOWANCE_LOCK_KEY):
+                self.logger.warning("Daily allowance deduction already running elsewhere, skipping")
+                return []
+            rows = await conn.fetch(query, description)
+        return [dict(row) for row in rows]
+    
+    async def refund_daily_allowance(self, user_id: int, amount: Decimal,
+                                     description: str = "Daily allowance refund") -> None:
+        """Credit back an allowance whose bank transfer failed and log the reversal."""
+        async with self.transaction() as conn:
+            await conn.execute(
+                "UPDATE users SET wallet_balance = wallet_balance + $2, updated_at = CURRENT_TIMESTAMP WHERE user_id = $1",
+                user_id, amount
+            )
+            # The day's 'allowance' row stays, so a re-run won't debit this user again today
+            await conn.execute(
+                """
+                INSERT INTO spending_history (user_id, amount, description, category, transaction_type)
+                VALUES ($1, $2, $3, 'allowance_refund', 'credit')
+                """,
+                user_id, amount, description
+            )
+    
     # Payment management
     async def record_payment(self, payment_data: Dict[str, Any]) -> int:
         """Record a new payment."""
@@ -438,6 +542,24 @@ class DatabaseService(BaseService):
             return dict(row)
         return None
     
+    async def patch_user_bank_details(self, user_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update only the given bank detail columns and return the stored row."""
+        columns = [column for column in self.BANK_DETAIL_COLUMNS if column in updates]
+        if not columns:
+            return await self.get_user_bank_details(user_id)
+        
+        # Column names come from the whitelist above; values are always bound
+        assignments = ", ".join(f"{column} = ${index}" for index, column in enumerate(columns, start=2))
+        query = f"""
+        UPDATE user_bank_details SET {assignments}, updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = $1
+        RETURNING account_number, bank_code, bank_name, account_name, is_verified
+        """
+        row = await self.execute_query(query, user_id, *(updates[column] for column in columns), fetch="one")
+        if row:
+            return dict(row)
+        return None
+    
     # Spending history
     async def log_spending(self, user_id: int, description: str, amount: Decimal, 
                           category: Optional[str] = None, transaction_type: str = "debit",
@@ -471,6 +593,77 @@ class DatabaseService(BaseService):
         rows = await self.execute_query(query, user_id, limit, fetch="all")
         return [dict(row) for row in rows]
     
+    # Food catalogue
+    async def load_food_items(self, items: List[Dict[str, Any]]) -> int:
+        """Bulk load food items with COPY if the table is still empty."""
+        async with self.transaction() as conn:
+            if await conn.fetchval("SELECT 1 FROM food_items LIMIT 1"):
+                return 0
+            
+            records = [
+                (
+                    item.get("item_name") or item["name"],
+                    Decimal(str(item["price"])),
+                    item.get("category"),
+                    item.get("description")
+                )
+                for item in items
+            ]
+            await conn.copy_records_to_table(
+                "food_items",
+                records=records,
+                columns=["name", "price", "category", "description"]
+            )
+            self._food_items_cache = None
+            self.logger.info(f"Loaded {len(records)} food items")
+            return len(records)
+    
+    async def load_food_items_from_json(self, path: str) -> int:
+        """Seed food_items from a JSON list of {item_name, price} entries."""
+        if not os.path.exists(path):
+            self.logger.warning(f"Food data file not found: {path}")
+            return 0
+        
+        items = await asyncio.to_thread(self._read_json_file, path)
+        return await self.load_food_items(items)
+    
+    @staticmethod
+    def _read_json_file(path: str) -> Any:
+        """Blocking helper that reads and parses a JSON file."""
+        with open(path, 'r') as f:
+            return json.load(f)
+    
+    async def get_food_items(self, max_price: Optional[Decimal] = None) -> List[Dict[str, Any]]:
+        """Get the available food catalogue, optionally only items priced up to max_price."""
+        if max_price is not None:
+            query = """
+            SELECT id, name, price, category FROM food_items
+            WHERE availability = TRUE AND price <= $1
+            ORDER BY price
+            """
+            rows = await self.execute_query(query, max_price, fetch="all")
+            return [dict(row) for row in rows]
+        
+        # The full catalogue is cached for FOOD_ITEMS_TTL seconds
+        cached = self._food_items_cache
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        query = "SELECT id, name, price, category FROM food_items WHERE availability = TRUE ORDER BY price"
+        rows = await self.execute_query(query, fetch="all")
+        items = [dict(row) for row in rows]
+        self._food_items_cache = (time.monotonic() + self.FOOD_ITEMS_TTL, items)
+        return items
+    
+    async def get_meal_plan_names_for_day(self, day_of_week: int) -> Dict[int, str]:
+        """Get every user's planned meal name for a weekday in one query."""
+        query = """
+        SELECT user_id, meal_name FROM user_meal_plans
+        WHERE day_of_week = $1 AND meal_name IS NOT NULL
+        """
+        rows = await self.execute_query(query, day_of_week, fetch="all")
+        return {row["user_id"]: row["meal_name"] for row in rows}
+    
     # Security logging
     async def log_security_event(self, user_id: Optional[int], event_type: str, 
                                 event_data: Dict[str, Any], severity: str = "INFO",
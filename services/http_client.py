@@ -0,0 +1,35 @@
+"""
+Shared HTTP helpers for the payment provider clients.
+Korapay and Monnify sessions are built and used the same way, so the plumbing lives here.
+"""
+
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+def build_connector(pool_limit: int, keepalive_timeout: float) -> aiohttp.TCPConnector:
+    """Build a pooled connector that keeps provider connections alive between calls."""
+    return aiohttp.TCPConnector(
+        limit=pool_limit,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=300
+    )
+
+async def request_json(session: aiohttp.ClientSession, method: str, url: str,
+                       data: Optional[Dict] = None,
+                       headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, Any]]:
+    """Send a single request and return the status code with the decoded JSON body."""
+    async with session.request(method, url, json=data, headers=headers) as response:
+        # Error pages are not always served as application/json
+        try:
+            body = await response.json(loads=_json_loads, content_type=None)
+        except ValueError:
+            body = None
+        return response.status, body if isinstance(body, dict) else {}
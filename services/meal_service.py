@@ -97,6 +97,9 @@ class MealService(BaseService):
         super().__init__(service_name, config or {})
         self.meal_database = {}  # Will be loaded from food_data.json
         self.ai_recommender = None
+        
+        # Flattened view of meal_database, built once it is loaded
+        self._all_meals: Tuple[MealItem, ...] = ()
     
     async def initialize(self) -> bool:
         """Initialize the meal service"""
@@ -108,6 +111,7 @@ class MealService(BaseService):
             
             # Load meal database
             await self._load_meal_database()
+            self._index_meal_database()
             
             # Create meal-related tables
             await self._create_meal_tables()
@@ -122,17 +126,23 @@ class MealService(BaseService):
             logger.error(f"Failed to initialize meal service: {e}")
             return False
     
+    async def shutdown(self) -> None:
+        """Shutdown the meal service"""
+        # The database connection belongs to the database service; only in-memory state is dropped here
+        self.meal_database = {}
+        self._all_meals = ()
+        logger.info("Meal service shutdown complete")
+    
     async def _load_meal_database(self):
         """Load meal database from food_data.json"""
         try:
-            import json
             import os
             
             food_data_path = os.path.join(os.path.dirname(__file__), '..', 'food_data.json')
             
             if os.path.exists(food_data_path):
-                with open(food_data_path, 'r') as f:
-                    food_data = json.load(f)
+                # Read and parse off the event loop
+                food_data = await asyncio.to_thread(self._read_json_file, food_data_path)
                 
                 # Convert to MealItem objects
                 for category, items in food_data.items():
@@ -161,6 +171,20 @@ class MealService(BaseService):
             logger.error(f"Error loading meal database: {e}")
             await self._create_default_meals()
     
+    @staticmethod
+    def _read_json_file(path: str) -> Any:
+        """Blocking helper that reads and parses a JSON file"""
+        import json
+        
+        with open(path, 'r') as f:
+            return json.load(f)
+    
+    def _index_meal_database(self):
+        """Build the cached meal tuple from meal_database"""
+        self._all_meals = tuple(
+            meal for meals in self.meal_database.values() for meal in meals
+        )
+    
     async def _create_default_meals(self):
         """Create default meal items if food_data.json is not available"""
         default_meals = {
@@ -292,20 +316,19 @@ class MealService(BaseService):
             # Get available meals for this type
             available_meals = []
             
-            # Check each category in meal database
-            for category, meals in self.meal_database.items():
-                for meal in meals:
-                    # Check if meal type matches or is flexible
-                    if meal.meal_type == meal_type or meal_type == MealType.LUNCH:
-                        # Check dietary restrictions
-                        if profile and not self._matches_dietary_profile(meal, profile):
-                            continue
-                        
-                        # Check budget constraint
-                        if budget_limit and meal.estimated_cost > budget_limit * 0.4:  # Max 40% of daily budget per meal
-                            continue
-                        
-                        available_meals.append(meal)
+            # Check each cached meal item
+            for meal in self._all_meals:
+                # Check if meal type matches or is flexible
+                if meal.meal_type == meal_type or meal_type == MealType.LUNCH:
+                    # Check dietary restrictions
+                    if profile and not self._matches_dietary_profile(meal, profile):
+                        continue
+                    
+                    # Check budget constraint
+                    if budget_limit and meal.estimated_cost > budget_limit * 0.4:  # Max 40% of daily budget per meal
+                        continue
+                    
+                    available_meals.append(meal)
             
             if not available_meals:
                 return None
@@ -358,8 +381,7 @@ class MealService(BaseService):
             }
             
             # Get AI recommendation
-            recommendation = await asyncio.get_event_loop().run_in_executor(
-                None, 
+            recommendation = await asyncio.to_thread(
                 self.ai_recommender.get_meal_recommendation,
                 meal_data, 
                 user_profile
@@ -582,7 +604,7 @@ class MealService(BaseService):
                 "status": "healthy",
                 "database_connection": "ok",
                 "total_meal_plans": result['count'] if result else 0,
-                "meal_database_size": sum(len(items) for items in self.meal_database.values()),
+                "meal_database_size": len(self._all_meals),
                 "ai_recommender_available": self.ai_recommender is not None,
                 "timestamp": datetime.now().isoformat()
             }
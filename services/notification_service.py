@@ -2,20 +2,40 @@
 Notification Service - Handles all messaging and notifications
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from .base_service import BaseService
 
 logger = logging.getLogger(__name__)
 
+# Telegram's maximum message length
+MAX_MESSAGE_LENGTH = 4096
+
 class NotificationService(BaseService):
     """Service for managing notifications and messaging"""
     
+    # Most queued messages joined into one Telegram message
+    MAX_BATCH_SIZE = 8
+    # Seconds shutdown waits for queued messages to go out
+    SHUTDOWN_FLUSH_TIMEOUT = 5
+    # Telegram allows roughly 30 bot messages per second across all chats
+    MAX_MESSAGES_PER_SECOND = 30
+    
     def __init__(self, service_name: str = "notification", config: Dict[str, Any] = None):
         super().__init__(service_name, config or {})
         self.bot_instance = None
         self.message_templates = self._load_message_templates()
+        
+        # Messages waiting behind an in-flight send, keyed by (chat_id, parse_mode);
+        # a key is present exactly while a send to that chat is in flight
+        self._pending: Dict[Tuple[int, Optional[str]], List[Tuple[str, asyncio.Future]]] = {}
+        self._flush_tasks: set = set()
+        self._closed = False
+        # Earliest monotonic time the next outbound message may be sent
+        self._next_send_at = 0.0
     
     def set_bot_instance(self, bot_instance):
         """Set the Telegram bot instance for sending messages"""
@@ -27,9 +47,30 @@ class NotificationService(BaseService):
         pass
     
     async def shutdown(self) -> None:
-        """Shutdown the notification service"""
+        """Shutdown the notification service, sending what is already queued"""
+        self._closed = True
+        
+        # In-flight sends start flushes when they finish, so wait until nothing is in flight or time runs out
+        deadline = time.monotonic() + self.SHUTDOWN_FLUSH_TIMEOUT
+        while (self._pending or self._flush_tasks) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        
+        for task in list(self._flush_tasks):
+            task.cancel()
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        
+        # Anything still queued behind an unfinished send is reported as not sent
+        for batch in self._pending.values():
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(False)
+        self._pending.clear()
         self.logger.info("Notification service shutdown")
-        pass
+    
+    async def health_check(self) -> bool:
+        """Healthy once a bot instance is available to send through"""
+        return self.bot_instance is not None
     
     def _load_message_templates(self) -> Dict[str, str]:
         """Load message templates for different notification types"""
@@ -258,7 +299,8 @@ Time: {timestamp}
         
         for user_id in user_ids:
             try:
-                success = await self._send_message(user_id, message, parse_mode)
+                # Each recipient is a separate chat, so skip the per-chat coalescing
+                success = await self._send_message(user_id, message, parse_mode, coalesce=False)
                 if success:
                     results["success"] += 1
                 else:
@@ -269,16 +311,60 @@ Time: {timestamp}
         
         return results
     
-    async def _send_message(self, user_id: int, message: str, parse_mode: str = None) -> bool:
-        """Internal method to send message via Telegram bot"""
+    async def _send_message(self, user_id: int, message: str, parse_mode: str = None,
+                            coalesce: bool = True) -> bool:
+        """Internal method to send message via Telegram bot, coalescing overlapping sends per chat"""
         if not self.bot_instance:
             logger.error("Bot instance not set for notification service")
             return False
+        if self._closed:
+            logger.warning(f"Notification service is shut down, not sending to user {user_id}")
+            return False
+        if not coalesce:
+            return await self._deliver(user_id, message, parse_mode)
+        
+        key = (user_id, parse_mode)
+        pending = self._pending.get(key)
+        if pending is not None:
+            # A send to this chat is in flight; go out together with the next one
+            future = asyncio.get_running_loop().create_future()
+            pending.append((message, future))
+            return await future
         
+        # Nothing in flight for this chat, so send right away
+        self._pending[key] = []
+        try:
+            return await self._deliver(user_id, message, parse_mode)
+        finally:
+            self._start_flush(key)
+    
+    def _start_flush(self, key: Tuple[int, Optional[str]]) -> None:
+        """Send messages queued behind a finished send in a background task"""
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        
+        # Later sends queue behind this batch the same way
+        self._pending[key] = []
+        task = asyncio.create_task(self._flush_batch(key, batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _wait_for_send_slot(self) -> None:
+        """Space outbound messages to stay under Telegram's global rate limit"""
+        now = time.monotonic()
+        send_at = max(now, self._next_send_at)
+        self._next_send_at = send_at + 1 / self.MAX_MESSAGES_PER_SECOND
+        if send_at > now:
+            await asyncio.sleep(send_at - now)
+    
+    async def _deliver(self, user_id: int, text: str, parse_mode: Optional[str]) -> bool:
+        """Send one Telegram message once a rate-limit slot is free"""
+        await self._wait_for_send_slot()
         try:
             await self.bot_instance.send_message(
                 chat_id=user_id,
-                text=message,
+                text=text,
                 parse_mode=parse_mode
             )
             return True
@@ -286,6 +372,34 @@ Time: {timestamp}
             logger.error(f"Failed to send message to user {user_id}: {e}")
             return False
     
+    async def _flush_batch(self, key: Tuple[int, Optional[str]], batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Send batched messages joined together, splitting at Telegram's length limit"""
+        user_id, parse_mode = key
+        
+        groups: List[List[Tuple[str, asyncio.Future]]] = []
+        length = 0
+        for message, future in batch:
+            if (groups and len(groups[-1]) < self.MAX_BATCH_SIZE
+                    and length + 2 + len(message) <= MAX_MESSAGE_LENGTH):
+                groups[-1].append((message, future))
+                length += 2 + len(message)
+            else:
+                groups.append([(message, future)])
+                length = len(message)
+        
+        try:
+            for group in groups:
+                success = await self._deliver(user_id, "\n\n".join(message for message, _ in group), parse_mode)
+                for _, future in group:
+                    if not future.done():
+                        future.set_result(success)
+        finally:
+            # Cancelled during shutdown: callers still waiting get a failed send, not a hang
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(False)
+        self._start_flush(key)
+    
     async def schedule_notification(self, user_id: int, message: str, 
                                   scheduled_time: datetime, notification_id: str = None) -> str:
         """Schedule a notification for later delivery"""
@@ -156,6 +156,8 @@ class ApplicationOrchestrator:
             transfer_service=self.services['transfer'],
             db_service=db_service
         )
+        # User Service writes bank details too, and must evict Bank Service's cached copy
+        self.services['user'].add_dependency("bank", self.services['bank'])
         
         # Budget Service dependencies
         self.services['budget'].set_dependencies(
@@ -401,6 +403,21 @@ class ApplicationOrchestrator:
                 'error_code': 'BANK_SETUP_ERROR'
             }
     
+    async def acquire_payment_lock(self, user_id: int, reference: str) -> bool:
+        """Guard against duplicate verification of the same payment"""
+        try:
+            return await self.services['user'].acquire_payment_lock(user_id, reference)
+        except Exception as e:
+            logger.error(f"❌ Payment lock failed for user {user_id}: {e}")
+            return True
+    
+    async def release_payment_lock(self, user_id: int, reference: str) -> None:
+        """Allow the payment to be verified again"""
+        try:
+            await self.services['user'].release_payment_lock(user_id, reference)
+        except Exception as e:
+            logger.error(f"❌ Payment lock release failed for user {user_id}: {e}")
+
     async def get_user_dashboard_data(self, user_id: int) -> Dict[str, Any]:
         """Get comprehensive dashboard data for user"""
         try:
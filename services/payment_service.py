@@ -8,6 +8,7 @@ import hashlib
 import hmac
 import json
 import logging
+from collections import OrderedDict
 from decimal import Decimal
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
@@ -16,6 +17,7 @@ import aiohttp
 from aiohttp import ClientTimeout
 
 from services.base_service import BaseService, service
+from services.http_client import build_connector, request_json
 from services.database_service import DatabaseService
 
 logger = logging.getLogger(__name__)
@@ -28,6 +30,9 @@ class PaymentVerificationError(PaymentError):
     """Payment verification error."""
     pass
 
+# Korapay charge statuses that will not change on a later verification
+FINAL_PAYMENT_STATUSES = frozenset({"success", "failed", "cancelled", "expired"})
+
 @service("payment")
 class PaymentService(BaseService):
     """Enhanced payment service using Korapay with monitoring and security."""
@@ -38,9 +43,11 @@ class PaymentService(BaseService):
         self.security_config = config.get("security")
         self.monitoring_config = config.get("monitoring")
         
-        # HTTP client configuration
+        # HTTP client configuration; one keep-alive pool per provider host
         self.timeout = ClientTimeout(total=30, connect=10)
         self.session: Optional[aiohttp.ClientSession] = None
+        self.pool_limit = 32
+        self.keepalive_timeout = 60
         
         # Payment statistics
         self._payment_stats = {
@@ -55,15 +62,24 @@ class PaymentService(BaseService):
         # Retry configuration
         self.max_retries = 3
         self.retry_delays = [1, 2, 4]  # seconds
+        
+        # LRU of verification results for payments in a final state, keyed by reference
+        self._verified_payments: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._verified_payments_max = 4096
     
     async def initialize(self) -> None:
         """Initialize payment service."""
         if not self.korapay_config.secret_key:
             raise PaymentError("Korapay secret key not configured")
         
+        # Endpoint URLs only depend on config, so build them once
+        self._charges_url = f"{self.korapay_config.base_url}/charges"
+        self._charge_url_fmt = self._charges_url + "/{}"
+        
         # Create HTTP session
         self.session = aiohttp.ClientSession(
             timeout=self.timeout,
+            connector=build_connector(self.pool_limit, self.keepalive_timeout),
             headers={
                 "Authorization": f"Bearer {self.korapay_config.secret_key}",
                 "Content-Type": "application/json"
@@ -82,7 +98,7 @@ class PaymentService(BaseService):
         """Check payment service health."""
         try:
             # Test API connectivity
-            url = f"{self.korapay_config.base_url}/charges"
+            url = self._charges_url
             async with self.session.get(url) as response:
                 return response.status in [200, 401, 403]  # API is responding
         except Exception as e:
@@ -129,7 +145,7 @@ class PaymentService(BaseService):
             # Make API request with retry logic
             response_data = await self._make_api_request(
                 "POST",
-                f"{self.korapay_config.base_url}/charges",
+                self._charges_url,
                 data=payment_data
             )
             
@@ -186,11 +202,17 @@ class PaymentService(BaseService):
     
     async def verify_payment(self, reference: str) -> Dict[str, Any]:
         """Verify payment status with Korapay."""
+        # A final status never changes, so repeat taps don't need Korapay or the ledger again
+        cached = self._verified_payments.get(reference)
+        if cached is not None:
+            self._verified_payments.move_to_end(reference)
+            return cached
+        
         try:
             # Make API request to verify payment
             response_data = await self._make_api_request(
                 "GET",
-                f"{self.korapay_config.base_url}/charges/{reference}"
+                self._charge_url_fmt.format(reference)
             )
             
             if not response_data.get("status"):
@@ -269,12 +291,19 @@ class PaymentService(BaseService):
                         severity="WARNING"
                     )
             
-            return {
+            result = {
                 "status": True,
                 "data": payment_data,
                 "payment_status": payment_status
             }
             
+            if payment_status in FINAL_PAYMENT_STATUSES:
+                self._verified_payments[reference] = result
+                if len(self._verified_payments) > self._verified_payments_max:
+                    self._verified_payments.popitem(last=False)
+            
+            return result
+            
         except Exception as e:
             self.logger.error(f"Payment verification failed for {reference}: {e}")
             raise PaymentVerificationError(f"Failed to verify payment: {e}")
@@ -371,20 +400,19 @@ class PaymentService(BaseService):
         """Make HTTP request to Korapay API with retry logic."""
         for attempt in range(self.max_retries):
             try:
-                async with self.session.request(method, url, json=data) as response:
-                    response_data = await response.json()
+                status, response_data = await request_json(self.session, method, url, data)
+                
+                if status == 200:
+                    return response_data
+                elif status in [401, 403]:
+                    raise PaymentError(f"Authentication failed: {response_data.get('message')}")
+                elif (status == 429 or status >= 500) and attempt < self.max_retries - 1:
+                    # Retry on rate limiting and server errors
+                    await asyncio.sleep(self.retry_delays[attempt])
+                    continue
+                else:
+                    raise PaymentError(f"API request failed: {status} - {response_data.get('message')}")
                     
-                    if response.status == 200:
-                        return response_data
-                    elif response.status in [401, 403]:
-                        raise PaymentError(f"Authentication failed: {response_data.get('message')}")
-                    elif response.status >= 500 and attempt < self.max_retries - 1:
-                        # Retry on server errors
-                        await asyncio.sleep(self.retry_delays[attempt])
-                        continue
-                    else:
-                        raise PaymentError(f"API request failed: {response.status} - {response_data.get('message')}")
-                        
             except aiohttp.ClientError as e:
                 if attempt < self.max_retries - 1:
                     await asyncio.sleep(self.retry_delays[attempt])
@@ -4,65 +4,255 @@ Handles scheduled tasks for the bot using APScheduler.
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from services.database_service import DatabaseService
-from services.meal_service import MealService
 from services.user_service import UserService
 from services.notification_service import NotificationService
 from datetime import datetime, date
 import asyncio
+import bisect
+import functools
+import itertools
 import json
+import time
+import traceback
 
 # You must inject or initialize these services in your main app and pass them to the scheduler functions
-# Example: scheduler.setup_scheduler(database_service, meal_service, user_service, notification_service, bot_send_message_func)
+# Example: scheduler.setup_scheduler(scheduler, database_service, bot_send_message_func, transfer_service)
+# Build bot_send_message_func with make_bot_sender(application.bot) rather than reading a module-level bot.
+
+# Upper bound on users processed concurrently by a scheduled job
+MAX_CONCURRENT_USERS = 20
+# Upper bound on bank transfers in flight at once, to respect provider rate limits
+MAX_CONCURRENT_TRANSFERS = 8
+# Outbound messages per second across all jobs, kept under Telegram's ~30/s limit
+MAX_MESSAGES_PER_SECOND = 25
+# Seconds after a missed fire time that a daily job may still run once
+JOB_MISFIRE_GRACE_TIME = 3600
+# Number of meals listed in each daily suggestion message
+MAX_DAILY_SUGGESTIONS = 3
+
+# Daily suggestion message templates
+SUGGESTION_HEADER = "Good morning, {day}! Your daily allowance: NGN{allowance:.2f}\nHere are some meal ideas:\n"
+CUSTOM_MEAL_LINE = "⭐ {name} (NGN{price:.2f}) - From your custom plan!"
+MEAL_LINE = "🍲 {name} (NGN{price:.2f})"
+NO_SUGGESTIONS_MESSAGE = "Good morning! Unfortunately, no meals are currently within your daily budget of NGN{allowance:.2f} for {day}. You might need to adjust your budget or add more items."
+
+# Daily allowance transfer message templates
+ALLOWANCE_SENT_MESSAGE = "Your daily allowance of NGN{amount:.2f} has been sent to your {bank_name} account."
+ALLOWANCE_REFUNDED_MESSAGE = "We couldn't send today's allowance of NGN{amount:.2f} to your bank, so it has been returned to your wallet."
 
 async def send_telegram_message(user_id: int, message: str):
     """Placeholder for the actual function that sends a message via Telegram Bot."""
     print(f"SCHEDULER: Sending message to {user_id}: {message}")
     pass
 
-async def suggest_daily_meals_for_user(user_id: int, database_service: DatabaseService, meal_service: MealService, bot_send_message_func):
+async def send_via_bot(bot, user_id: int, message: str):
+    """Send a scheduler message through the given Telegram bot."""
+    await bot.send_message(chat_id=user_id, text=message)
+
+def make_bot_sender(bot):
+    """Bind a bot into a bot_send_message_func suitable for setup_scheduler."""
+    return functools.partial(send_via_bot, bot)
+
+def make_paced_sender(send_func, rate: float = MAX_MESSAGES_PER_SECOND):
+    """Wrap a bot_send_message_func so concurrent jobs share one send rate."""
+    next_send_at = 0.0
+
+    async def paced_send(user_id: int, message: str):
+        nonlocal next_send_at
+        now = time.monotonic()
+        send_at = max(now, next_send_at)
+        next_send_at = send_at + 1 / rate
+        if send_at > now:
+            await asyncio.sleep(send_at - now)
+        await send_func(user_id, message)
+
+    return paced_send
+
+def index_food_items(food_items: list):
+    """Builds the price list and name index for a price-sorted catalogue in one pass."""
+    prices = []
+    items_by_name = {}
+    for item in food_items:
+        prices.append(item['price'])
+        items_by_name[item['name']] = item
+    return prices, items_by_name
+
+async def suggest_daily_meals_for_user(user_id: int, database_service: DatabaseService, bot_send_message_func, today_str: str = None, user_data: dict = None, food_items: list = None, items_by_name: dict = None, custom_meal_name: str = None, prices: list = None, weekday: int = None):
     """Generates and sends daily meal suggestions to a specific user, aiming for variety."""
-    user_data = await database_service.get_user_data(user_id)
+    # Scheduled runs pass the row preloaded by get_all_users_with_budgets
+    if user_data is None:
+        user_data = await database_service.get_user_data(user_id)
     if not user_data or not user_data.get('daily_allowance') or user_data['daily_allowance'] <= 0:
         print(f"Skipping meal suggestion for {user_id}, no daily allowance.")
         return
 
     daily_allowance = user_data['daily_allowance']
-    today_str = date.today().strftime("%A")
-    # Use meal_service to get suggestions (implement this method in meal_service if not present)
-    suggestions_result = await meal_service.get_daily_meal_suggestions(user_id, daily_allowance)
-    if suggestions_result and suggestions_result.get('success'):
-        meals = suggestions_result.get('meals', [])
-        message = f"Good morning, {today_str}! Your daily allowance: NGN{daily_allowance:.2f}\nHere are some meal ideas:\n"
-        message += "\n".join([f"🍲 {meal['name']} (NGN{meal['estimated_cost']:.2f})" for meal in meals])
+    if today_str is None or weekday is None:
+        today = date.today()
+        today_str, weekday = today.strftime("%A"), today.weekday()
+    # Scheduled runs share one price-sorted catalogue across all users
+    if food_items is None:
+        food_items = await database_service.get_food_items(user_data['daily_allowance'])
+        prices = items_by_name = None
+    if prices is None or items_by_name is None:
+        prices, items_by_name = index_food_items(food_items)
+
+    suggestions = []
+    custom_item = items_by_name.get(custom_meal_name) if custom_meal_name else None
+    if custom_item and custom_item['price'] <= daily_allowance:
+        suggestions.append((custom_item, True))
+
+    # Everything before the cutoff in the price-sorted catalogue is affordable
+    cutoff = bisect.bisect_right(prices, daily_allowance)
+    if cutoff:
+        # Rotate the starting point by weekday so the same user sees different meals
+        start = weekday
+        rotation = (food_items[(start + offset) % cutoff] for offset in range(cutoff))
+        picks = itertools.islice((item for item in rotation if item is not custom_item), MAX_DAILY_SUGGESTIONS - len(suggestions))
+        suggestions.extend((item, False) for item in picks)
+
+    if suggestions:
+        message = SUGGESTION_HEADER.format(day=today_str, allowance=daily_allowance) + "\n".join([
+            (CUSTOM_MEAL_LINE if from_plan else MEAL_LINE).format(name=item['name'], price=item['price'])
+            for item, from_plan in suggestions
+        ])
     else:
-        message = f"Good morning! Unfortunately, no meals are currently within your daily budget of NGN{daily_allowance:.2f} for {today_str}. You might need to adjust your budget or add more items."
+        message = NO_SUGGESTIONS_MESSAGE.format(day=today_str, allowance=daily_allowance)
     await bot_send_message_func(user_id, message)
 
-async def scheduled_daily_meal_suggestions(database_service: DatabaseService, meal_service: MealService, bot_send_message_func):
+async def scheduled_daily_meal_suggestions(database_service: DatabaseService, bot_send_message_func):
     """Scheduled job to send daily meal suggestions to all active users."""
     print(f"SCHEDULER: Running daily meal suggestions job at {datetime.now()}")
     try:
         # Get all users with budgets set
         users = await database_service.get_all_users_with_budgets()
         print(f"SCHEDULER: Found {len(users)} users with budgets set")
-        for user in users:
-            user_id = user['user_id']
-            await suggest_daily_meals_for_user(user_id, database_service, meal_service, bot_send_message_func)
+        today = date.today()
+        today_str, weekday = today.strftime("%A"), today.weekday()
+        if not users:
+            return
+        # Read the catalogue and today's custom plans once for the whole run;
+        # nothing above the largest allowance can be suggested, so the database drops it
+        max_allowance = max(user['daily_allowance'] for user in users)
+        food_items = await database_service.get_food_items(max_allowance)
+        prices, items_by_name = index_food_items(food_items)
+        custom_meals = await database_service.get_meal_plan_names_for_day(weekday)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_USERS)
+
+        async def _run(user: dict):
+            async with semaphore:
+                await suggest_daily_meals_for_user(
+                    user['user_id'], database_service, bot_send_message_func, today_str, user,
+                    food_items, items_by_name, custom_meals.get(user['user_id']), prices, weekday
+                )
+
+        results = await asyncio.gather(*[_run(user) for user in users], return_exceptions=True)
+        for user, result in zip(users, results):
+            if isinstance(result, Exception):
+                print(f"SCHEDULER: Meal suggestion failed for {user['user_id']}: {result}")
     except Exception as e:
         print(f"SCHEDULER: Error in scheduled_daily_meal_suggestions: {e}")
-        import traceback
         print(f"SCHEDULER: Traceback: {traceback.format_exc()}")
 
-# Similar refactoring should be done for allowance deduction and price tracking jobs, using async methods from the new services.
-# You may need to implement get_all_users_with_budgets and other helper methods in DatabaseService if not present.
+async def transfer_daily_allowance(deduction: dict, database_service: DatabaseService, transfer_service, bot_send_message_func):
+    """Transfers one user's deducted allowance, refunding the wallet if the transfer can't be made."""
+    user_id = deduction['user_id']
+    amount = deduction['amount']
+    try:
+        if not deduction.get('account_number'):
+            raise ValueError("No bank details saved")
+        result = await transfer_service.initiate_transfer(
+            user_id=user_id,
+            amount=amount,
+            account_number=deduction['account_number'],
+            bank_code=deduction['bank_code'],
+            narration="Daily allowance transfer",
+            account_name=deduction['account_name']
+        )
+        if not result or not result.get('status'):
+            raise ValueError(f"Transfer was not accepted: {result}")
+    except Exception as transfer_error:
+        # The wallet was debited before the transfer, so the money goes back to it
+        try:
+            await database_service.refund_daily_allowance(user_id, amount)
+        except Exception as refund_error:
+            return user_id, False, f"Transfer failed ({transfer_error}) and refund failed ({refund_error}); wallet needs a manual credit"
+        await _notify(bot_send_message_func, user_id, ALLOWANCE_REFUNDED_MESSAGE.format(amount=amount))
+        return user_id, False, f"Transfer failed, allowance refunded: {transfer_error}"
+
+    await _notify(bot_send_message_func, user_id, ALLOWANCE_SENT_MESSAGE.format(amount=amount, bank_name=deduction['bank_name']))
+    return user_id, True, None
+
+async def _notify(bot_send_message_func, user_id: int, message: str):
+    """Send a best-effort notification; a failed send must not change the transfer outcome."""
+    try:
+        await bot_send_message_func(user_id, message)
+    except Exception as e:
+        print(f"SCHEDULER: Could not notify {user_id}: {e}")
+
+async def scheduled_daily_allowance_deduction(database_service: DatabaseService, bot_send_message_func, transfer_service=None):
+    """Scheduled job to deduct the daily allowance from every funded wallet and send it to the user's bank."""
+    print(f"SCHEDULER: Running daily allowance deduction job at {datetime.now()}")
+    if transfer_service is None:
+        # A deduction is only half of the job; never debit wallets without a way to pay out
+        print("SCHEDULER: Skipping daily allowance deduction, no transfer service available")
+        return
+    try:
+        # One set-based statement deducts, logs spending and returns bank details for all eligible users
+        deductions = await database_service.deduct_daily_allowances()
+        print(f"SCHEDULER: Deducted daily allowance for {len(deductions)} users")
+        if not deductions:
+            return
+
+        # Transfers are independent, so keep a bounded number in flight at once
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRANSFERS)
+
+        async def _transfer(deduction: dict):
+            async with semaphore:
+                return await transfer_daily_allowance(deduction, database_service, transfer_service, bot_send_message_func)
+
+        results = await asyncio.gather(*[_transfer(deduction) for deduction in deductions], return_exceptions=True)
+        succeeded = 0
+        for deduction, result in zip(deductions, results):
+            if isinstance(result, Exception):
+                print(f"SCHEDULER: Allowance transfer failed for {deduction['user_id']}: {result}")
+            elif result[1]:
+                succeeded += 1
+            else:
+                print(f"SCHEDULER: Allowance transfer failed for {result[0]}: {result[2]}")
+        print(f"SCHEDULER: Initiated {succeeded}/{len(deductions)} allowance transfers")
+    except Exception as e:
+        print(f"SCHEDULER: Error in scheduled_daily_allowance_deduction: {e}")
+        print(f"SCHEDULER: Traceback: {traceback.format_exc()}")
+
+# Similar refactoring should be done for the price tracking job, using async methods from the new services.
+# You may need to implement other helper methods in DatabaseService if not present.
 
-def setup_scheduler(scheduler: AsyncIOScheduler, database_service: DatabaseService, meal_service: MealService, bot_send_message_func):
+def setup_scheduler(scheduler: AsyncIOScheduler, database_service: DatabaseService, bot_send_message_func, transfer_service=None):
     """Set up scheduled jobs for the bot."""
+    # Every job sends through the same pacer so fan-out never trips Telegram's flood limit
+    bot_send_message_func = make_paced_sender(bot_send_message_func)
     scheduler.add_job(
         scheduled_daily_meal_suggestions,
         CronTrigger(hour=7, minute=0),
-        args=[database_service, meal_service, bot_send_message_func],
-        name="Daily Meal Suggestions"
+        args=[database_service, bot_send_message_func],
+        id="daily_meal_suggestions",
+        name="Daily Meal Suggestions",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+        misfire_grace_time=JOB_MISFIRE_GRACE_TIME
+    )
+    scheduler.add_job(
+        scheduled_daily_allowance_deduction,
+        CronTrigger(hour=8, minute=0),
+        args=[database_service, bot_send_message_func, transfer_service],
+        id="daily_allowance_deduction",
+        name="Daily Allowance Deduction",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+        misfire_grace_time=JOB_MISFIRE_GRACE_TIME
     )
     # Add other scheduled jobs as needed
     print("SCHEDULER: Scheduler setup complete.")
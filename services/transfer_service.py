@@ -15,6 +15,7 @@ import aiohttp
 from aiohttp import ClientTimeout
 
 from services.base_service import BaseService, service
+from services.http_client import build_connector, request_json
 from services.database_service import DatabaseService
 
 logger = logging.getLogger(__name__)
@@ -37,9 +38,11 @@ class TransferService(BaseService):
         self.security_config = config.get("security")
         self.monitoring_config = config.get("monitoring")
         
-        # HTTP client configuration
+        # HTTP client configuration; one keep-alive pool per provider host
         self.timeout = ClientTimeout(total=45, connect=15)
         self.session: Optional[aiohttp.ClientSession] = None
+        self.pool_limit = 32
+        self.keepalive_timeout = 60
         self._access_token: Optional[str] = None
         self._token_expires_at: Optional[datetime] = None
         
@@ -60,6 +63,8 @@ class TransferService(BaseService):
         # Cache for banks and validated accounts
         self._banks_cache: Optional[List[Dict]] = None
         self._banks_cache_expires: Optional[datetime] = None
+        self._banks_cache_ttl = timedelta(hours=24)  # Bank lists change rarely
+        self._banks_lock = asyncio.Lock()
         self._validated_accounts: Dict[str, Dict] = {}
     
     async def initialize(self) -> None:
@@ -67,8 +72,19 @@ class TransferService(BaseService):
         if not self.monnify_config.api_key or not self.monnify_config.secret_key:
             raise TransferError("Monnify credentials not configured")
         
+        # Endpoint URLs only depend on config, so build them once
+        api_url = f"{self.monnify_config.base_url}/api/v1"
+        self._login_url = f"{api_url}/auth/login"
+        self._banks_url = f"{api_url}/banks"
+        self._validate_account_url = f"{api_url}/disbursements/account/validate"
+        self._single_transfer_url = f"{api_url}/disbursements/single"
+        self._transfer_summary_url_fmt = f"{api_url}/disbursements/single/summary?reference={{}}"
+        
         # Create HTTP session
-        self.session = aiohttp.ClientSession(timeout=self.timeout)
+        self.session = aiohttp.ClientSession(
+            timeout=self.timeout,
+            connector=build_connector(self.pool_limit, self.keepalive_timeout)
+        )
         
         # Authenticate and get access token
         await self._authenticate()
@@ -103,25 +119,23 @@ class TransferService(BaseService):
                 "Content-Type": "application/json"
             }
             
-            url = f"{self.monnify_config.base_url}/api/v1/auth/login"
+            url = self._login_url
+            
+            status, data = await request_json(self.session, "POST", url, headers=headers)
+            if status != 200:
+                raise TransferError(f"Authentication failed: {status}")
+            
+            if not data.get("requestSuccessful"):
+                raise TransferError(f"Authentication failed: {data.get('responseMessage')}")
+            
+            response_body = data.get("responseBody", {})
+            self._access_token = response_body.get("accessToken")
+            expires_in = response_body.get("expiresIn", 3600)  # Default 1 hour
+            
+            self._token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in - 300)  # Refresh 5 minutes early
+            
+            self.logger.info("Successfully authenticated with Monnify")
             
-            async with self.session.post(url, headers=headers) as response:
-                if response.status != 200:
-                    raise TransferError(f"Authentication failed: {response.status}")
-                
-                data = await response.json()
-                
-                if not data.get("requestSuccessful"):
-                    raise TransferError(f"Authentication failed: {data.get('responseMessage')}")
-                
-                response_body = data.get("responseBody", {})
-                self._access_token = response_body.get("accessToken")
-                expires_in = response_body.get("expiresIn", 3600)  # Default 1 hour
-                
-                self._token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in - 300)  # Refresh 5 minutes early
-                
-                self.logger.info("Successfully authenticated with Monnify")
-                
         except Exception as e:
             self.logger.error(f"Monnify authentication failed: {e}")
             raise TransferError(f"Authentication failed: {e}")
@@ -131,18 +145,39 @@ class TransferService(BaseService):
         if not self._access_token or not self._token_expires_at or datetime.utcnow() >= self._token_expires_at:
             await self._authenticate()
     
+    def _cached_banks_if_fresh(self) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached bank list if it has not expired."""
+        if self._banks_cache and self._banks_cache_expires and datetime.utcnow() < self._banks_cache_expires:
+            return self._banks_cache
+        return None
+    
+    def invalidate_banks_cache(self) -> None:
+        """Drop the cached bank list so the next call refetches it."""
+        self._banks_cache = None
+        self._banks_cache_expires = None
+    
     async def get_banks(self) -> List[Dict[str, Any]]:
         """Get list of supported banks."""
         # Check cache first
-        if self._banks_cache and self._banks_cache_expires and datetime.utcnow() < self._banks_cache_expires:
-            return self._banks_cache
+        banks = self._cached_banks_if_fresh()
+        if banks is not None:
+            return banks
         
+        # Only one caller refreshes; the rest wait and reuse its result
+        async with self._banks_lock:
+            banks = self._cached_banks_if_fresh()
+            if banks is not None:
+                return banks
+            return await self._fetch_banks()
+    
+    async def _fetch_banks(self) -> List[Dict[str, Any]]:
+        """Fetch the bank list from Monnify and cache it."""
         try:
             await self._ensure_authenticated()
             
             response_data = await self._make_api_request(
                 "GET",
-                f"{self.monnify_config.base_url}/api/v1/banks"
+                self._banks_url
             )
             
             if not response_data.get("requestSuccessful"):
@@ -150,9 +185,8 @@ class TransferService(BaseService):
             
             banks = response_data.get("responseBody", [])
             
-            # Cache for 1 hour
             self._banks_cache = banks
-            self._banks_cache_expires = datetime.utcnow() + timedelta(hours=1)
+            self._banks_cache_expires = datetime.utcnow() + self._banks_cache_ttl
             
             self.logger.info(f"Retrieved {len(banks)} banks from Monnify")
             return banks
@@ -181,7 +215,7 @@ class TransferService(BaseService):
             
             response_data = await self._make_api_request(
                 "POST",
-                f"{self.monnify_config.base_url}/api/v1/disbursements/account/validate",
+                self._validate_account_url,
                 data=data
             )
             
@@ -253,7 +287,7 @@ class TransferService(BaseService):
             # Make API request
             response_data = await self._make_api_request(
                 "POST",
-                f"{self.monnify_config.base_url}/api/v1/disbursements/single",
+                self._single_transfer_url,
                 data=transfer_data
             )
             
@@ -326,7 +360,7 @@ class TransferService(BaseService):
             
             response_data = await self._make_api_request(
                 "GET",
-                f"{self.monnify_config.base_url}/api/v1/disbursements/single/summary?reference={reference}"
+                self._transfer_summary_url_fmt.format(reference)
             )
             
             if not response_data.get("requestSuccessful"):
@@ -352,24 +386,23 @@ class TransferService(BaseService):
         
         for attempt in range(self.max_retries):
             try:
-                async with self.session.request(method, url, json=data, headers=headers) as response:
-                    response_data = await response.json()
-                    
-                    if response.status == 200:
-                        return response_data
-                    elif response.status == 401:
-                        # Token expired, re-authenticate and retry
-                        await self._authenticate()
-                        headers["Authorization"] = f"Bearer {self._access_token}"
-                        if attempt < self.max_retries - 1:
-                            continue
-                    elif response.status >= 500 and attempt < self.max_retries - 1:
-                        # Retry on server errors
-                        await asyncio.sleep(self.retry_delays[attempt])
+                status, response_data = await request_json(self.session, method, url, data, headers)
+                
+                if status == 200:
+                    return response_data
+                elif status == 401:
+                    # Token expired, re-authenticate and retry
+                    await self._authenticate()
+                    headers["Authorization"] = f"Bearer {self._access_token}"
+                    if attempt < self.max_retries - 1:
                         continue
-                    else:
-                        raise TransferError(f"API request failed: {response.status} - {response_data.get('responseMessage')}")
-                        
+                elif (status == 429 or status >= 500) and attempt < self.max_retries - 1:
+                    # Retry on rate limiting and server errors
+                    await asyncio.sleep(self.retry_delays[attempt])
+                    continue
+                else:
+                    raise TransferError(f"API request failed: {status} - {response_data.get('responseMessage')}")
+                    
             except aiohttp.ClientError as e:
                 if attempt < self.max_retries - 1:
                     await asyncio.sleep(self.retry_delays[attempt])
@@ -387,6 +387,11 @@ class UserService(BaseService):
             if self.redis_client:
                 await self._invalidate_user_cache(user_id)
             
+            # BankService keeps its own copy of the record
+            bank_service = self.get_dependency("bank")
+            if bank_service:
+                bank_service.invalidate_user_bank_details(user_id)
+            
             self.logger.info(f"Bank details set for user {user_id}: {bank_details.get('bank_name')}")
             
         except Exception as e:
@@ -500,6 +505,34 @@ class UserService(BaseService):
             self.logger.warning(f"Failed to get cached user profile {user_id}: {e}")
         return None
     
+    async def acquire_payment_lock(self, user_id: int, reference: str, ttl: int = 30) -> bool:
+        """Acquire a short-lived lock for verifying a payment reference.
+
+        Returns False if another verification for the same reference is already
+        in progress. Without Redis the lock is not enforced.
+        """
+        if not self.redis_client:
+            return True
+
+        try:
+            acquired = await self.redis_client.set(
+                f"pay-lock:{user_id}:{reference}", "1", nx=True, ex=ttl
+            )
+            return bool(acquired)
+        except Exception as e:
+            self.logger.warning(f"Failed to acquire payment lock for user {user_id}: {e}")
+            return True
+
+    async def release_payment_lock(self, user_id: int, reference: str) -> None:
+        """Release the lock taken by acquire_payment_lock once verification ends."""
+        if not self.redis_client:
+            return
+
+        try:
+            await self.redis_client.delete(f"pay-lock:{user_id}:{reference}")
+        except Exception as e:
+            self.logger.warning(f"Failed to release payment lock for user {user_id}: {e}")
+
     async def _invalidate_user_cache(self, user_id: int) -> None:
         """Invalidate user cache entries."""
         try:
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests that the daily allowance deduction cannot run twice at once.
+"""
+
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.database_service import DatabaseService
+
+class FakeConnection:
+    """Grants the advisory lock unless another run holds it, and records deductions."""
+
+    def __init__(self, lock_free=True):
+        self.lock_free = lock_free
+        self.lock_keys = []
+        self.deductions = 0
+
+    async def fetchval(self, query, *args):
+        assert "pg_try_advisory_xact_lock" in query
+        self.lock_keys.extend(args)
+        return self.lock_free
+
+    async def fetch(self, query, *args):
+        self.deductions += 1
+        return [{"user_id": 1, "amount": Decimal("1000"), "currency": "NGN"}]
+
+def make_service(conn: FakeConnection) -> DatabaseService:
+    service = DatabaseService("database", {"database": {"url": "postgresql://test", "pool_size": 1}})
+
+    @asynccontextmanager
+    async def transaction():
+        yield conn
+
+    service.transaction = transaction
+    return service
+
+def test_deduction_runs_under_the_advisory_lock():
+    conn = FakeConnection()
+
+    rows = asyncio.run(make_service(conn).deduct_daily_allowances())
+
+    assert conn.lock_keys == [DatabaseService.ALLOWANCE_LOCK_KEY]
+    assert conn.deductions == 1
+    assert [row["user_id"] for row in rows] == [1]
+
+def test_concurrent_run_deducts_nothing():
+    conn = FakeConnection(lock_free=False)
+
+    rows = asyncio.run(make_service(conn).deduct_daily_allowances())
+
+    assert rows == []
+    assert conn.deductions == 0
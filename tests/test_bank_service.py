@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for BankService account hashing and bank details caching.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bank_service import BankService
+from services.database_service import DatabaseService
+from services.user_service import UserService
+
+def test_missing_account_hash_key_uses_a_random_process_key():
+    first = BankService("bank", {})
+    second = BankService("bank", {"account_hash_key": ""})
+
+    assert len(first._log_hash_key) == 32
+    assert first._hash_account_number("0123456789") != second._hash_account_number("0123456789")
+
+def test_account_hash_depends_on_the_key():
+    first = BankService("bank", {"account_hash_key": "first-secret"})
+    second = BankService("bank", {"account_hash_key": "second-secret"})
+
+    assert first._hash_account_number("0123456789") == first._hash_account_number("0123456789")
+    assert first._hash_account_number("0123456789") != second._hash_account_number("0123456789")
+    assert "0123456789" not in first._hash_account_number("0123456789")
+
+class FakeDatabase:
+    """Stores bank details per user and counts reads."""
+
+    def __init__(self):
+        self.details = {}
+        self.reads = 0
+        self.security_events = []
+
+    async def get_user_bank_details(self, user_id):
+        self.reads += 1
+        return self.details.get(user_id)
+
+    async def set_user_bank_details(self, user_id, bank_details):
+        self.details[user_id] = dict(bank_details)
+        return True
+
+    async def log_security_event(self, user_id, event_type, event_data, severity="INFO", ip_address=None):
+        self.security_events.append((user_id, event_type, event_data))
+
+def make_bank_service(db: FakeDatabase) -> BankService:
+    service = BankService("bank", {"account_hash_key": "test-secret"})
+    service.set_dependencies(transfer_service=None, db_service=db)
+    return service
+
+def test_bank_details_set_through_user_service_are_not_served_stale():
+    db = FakeDatabase()
+    db.details[1] = {"account_number": "0123456789", "bank_code": "058"}
+    bank = make_bank_service(db)
+    users = UserService("user", {})
+    users.add_dependency("database", db)
+    users.add_dependency("bank", bank)
+
+    async def run():
+        await bank.get_user_bank_details(1)
+        await users.set_user_bank_details(1, {"account_number": "9876543210", "bank_code": "044"})
+        return await bank.get_user_bank_details(1)
+
+    details = asyncio.run(run())
+
+    assert details["account_number"] == "9876543210"
+
+def test_cached_bank_details_expire():
+    db = FakeDatabase()
+    db.details[1] = {"account_number": "0123456789", "bank_code": "058"}
+    bank = make_bank_service(db)
+
+    async def run():
+        await bank.get_user_bank_details(1)
+        await bank.get_user_bank_details(1)
+        assert db.reads == 1
+        # A write this service never saw becomes visible once the entry expires
+        db.details[1] = {"account_number": "9876543210", "bank_code": "044"}
+        bank._user_bank_cache[1] = (0, bank._user_bank_cache[1][1])
+        return await bank.get_user_bank_details(1)
+
+    details = asyncio.run(run())
+
+    assert db.reads == 2
+    assert details["account_number"] == "9876543210"
+
+def test_update_without_updatable_fields_changes_nothing():
+    class PatchingDatabase(FakeDatabase):
+        BANK_DETAIL_COLUMNS = DatabaseService.BANK_DETAIL_COLUMNS
+
+        def __init__(self):
+            super().__init__()
+            self.patches = []
+
+        async def patch_user_bank_details(self, user_id, updates):
+            self.patches.append(updates)
+            return self.details.get(user_id)
+
+    db = PatchingDatabase()
+    db.details[1] = {"account_number": "0123456789", "bank_code": "058"}
+    bank = make_bank_service(db)
+
+    async def run():
+        drain = asyncio.create_task(bank._drain_security_events())
+        ignored = await bank.update_user_bank_details(1, {"nickname": "salary"})
+        applied = await bank.update_user_bank_details(1, {"bank_name": "GTBank"})
+        await asyncio.wait_for(bank._security_queue.join(), timeout=1)
+        drain.cancel()
+        return ignored, applied
+
+    ignored, applied = asyncio.run(run())
+
+    assert (ignored, applied) == (False, True)
+    assert db.patches == [{"bank_name": "GTBank"}]
+    # Only the applied update reaches the security audit sink
+    assert db.security_events == [(1, "BANK_DETAILS_UPDATED", {"updated_fields": ["bank_name"]})]
+
+def test_bank_list_refresh_bypasses_the_transfer_cache():
+    class CachingTransferService:
+        """Serves a cached bank list until invalidated, like TransferService.get_banks."""
+
+        def __init__(self):
+            self.cached = None
+            self.fetches = 0
+
+        def invalidate_banks_cache(self):
+            self.cached = None
+
+        async def get_banks(self):
+            if self.cached is None:
+                self.fetches += 1
+                self.cached = [{"name": "GTBank", "code": "058", "fetch": self.fetches}]
+            return self.cached
+
+    transfers = CachingTransferService()
+    bank = BankService("bank", {"account_hash_key": "test-secret"})
+    bank.BANKS_CACHE_TTL = 0.05
+    bank.set_dependencies(transfer_service=transfers, db_service=FakeDatabase())
+
+    async def run():
+        warmer = asyncio.create_task(bank._keep_banks_warm())
+        await asyncio.sleep(0.12)
+        warmer.cancel()
+        return await bank._get_cached_banks(allow_stale=True)
+
+    banks = asyncio.run(run())
+
+    assert transfers.fetches >= 3
+    assert banks[0]["fetch"] == transfers.fetches
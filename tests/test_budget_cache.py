@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the Redis budget info cache in BudgetService.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.budget_service import BudgetService
+
+class FakeRedis:
+    """In-memory stand-in for the few Redis commands the cache uses."""
+
+    def __init__(self):
+        self.store = {}
+        self.fail = False
+
+    async def setex(self, key, ttl, value):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.store[key] = value
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self.store.get(key)
+
+    async def delete(self, key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.store.pop(key, None)
+
+class FakeDatabase:
+    """Serves one user's budget row and counts reads."""
+
+    def __init__(self, budget=Decimal("10000"), spent=Decimal("0")):
+        self.budget = budget
+        self.spent = spent
+        self.reads = 0
+
+    async def fetch_one(self, query, params=None):
+        if "FROM user_budgets" not in query:
+            return None
+        self.reads += 1
+        return {
+            "current_budget": self.budget,
+            "budget_period": "monthly",
+            "updated_at": datetime(2024, 1, 1),
+            "spent_amount": self.spent,
+        }
+
+    async def execute_query(self, query, params=None):
+        return True
+
+    async def execute_many(self, query, rows):
+        return True
+
+def make_service(db: FakeDatabase, redis_client: FakeRedis) -> BudgetService:
+    service = BudgetService("budget", {})
+    service.db = db
+    service.redis_client = redis_client
+    return service
+
+def test_cached_budget_info_skips_the_database():
+    db = FakeDatabase()
+    service = make_service(db, FakeRedis())
+
+    async def run():
+        first = await service.get_budget_info(1)
+        second = await service.get_budget_info(1)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert db.reads == 1
+    assert second.current_budget == first.current_budget == Decimal("10000")
+
+def test_set_budget_invalidates_cached_info():
+    db = FakeDatabase()
+    redis_client = FakeRedis()
+    service = make_service(db, redis_client)
+
+    async def run():
+        await service.get_budget_info(1)
+        assert service._budget_cache_key(1) in redis_client.store
+        await service.set_budget(1, Decimal("20000"))
+
+    asyncio.run(run())
+
+    assert service._budget_cache_key(1) not in redis_client.store
+
+def test_budget_alerts_see_spending_recorded_after_caching():
+    db = FakeDatabase(spent=Decimal("0"))
+    service = make_service(db, FakeRedis())
+
+    async def run():
+        await service.get_budget_info(1)
+        # Spending written elsewhere does not touch the budget cache
+        db.spent = Decimal("9500")
+        return await service.check_budget_alerts(1)
+
+    alerts = asyncio.run(run())
+
+    assert alerts
+
+def test_redis_errors_fall_back_to_the_database():
+    db = FakeDatabase()
+    redis_client = FakeRedis()
+    redis_client.fail = True
+    service = make_service(db, redis_client)
+
+    info = asyncio.run(service.get_budget_info(1))
+
+    assert info.current_budget == Decimal("10000")
+    assert db.reads == 1
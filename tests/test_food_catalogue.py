@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for seeding the food_items table from food_data.json.
+"""
+
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.database_service import DatabaseService, FOOD_DATA_PATH
+
+class FakeConnection:
+    """Records COPY calls against an in-memory food_items table."""
+
+    def __init__(self, rows=None):
+        self.rows = list(rows or [])
+
+    async def fetchval(self, query, *args):
+        return 1 if self.rows else None
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.rows.extend(dict(zip(columns, record)) for record in records)
+
+def make_service(conn: FakeConnection) -> DatabaseService:
+    service = DatabaseService("database", {"database": {"url": "postgresql://test", "pool_size": 1}})
+
+    @asynccontextmanager
+    async def transaction():
+        yield conn
+
+    service.transaction = transaction
+    return service
+
+def test_seeds_empty_table_from_food_data():
+    conn = FakeConnection()
+    loaded = asyncio.run(make_service(conn).load_food_items_from_json(FOOD_DATA_PATH))
+
+    assert loaded > 0
+    assert len(conn.rows) == loaded
+    assert all(row["name"] and row["price"] > 0 for row in conn.rows)
+
+def test_does_not_reseed_populated_table():
+    conn = FakeConnection([{"name": "Rice", "price": 500}])
+    loaded = asyncio.run(make_service(conn).load_food_items_from_json(FOOD_DATA_PATH))
+
+    assert loaded == 0
+    assert len(conn.rows) == 1
+
+def test_missing_food_data_file_is_skipped(tmp_path):
+    conn = FakeConnection()
+    loaded = asyncio.run(make_service(conn).load_food_items_from_json(str(tmp_path / "missing.json")))
+
+    assert loaded == 0
+    assert conn.rows == []
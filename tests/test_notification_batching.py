@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests for per-chat message coalescing in NotificationService.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.notification_service import NotificationService
+
+class FakeBot:
+    """Records sent messages; each send takes `delay` seconds."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        await asyncio.sleep(self.delay)
+        self.sent.append((chat_id, text, parse_mode))
+
+def make_service(bot: FakeBot) -> NotificationService:
+    service = NotificationService()
+    # Rate limiting is not under test here
+    service.MAX_MESSAGES_PER_SECOND = 10_000
+    service.set_bot_instance(bot)
+    return service
+
+def test_lone_message_is_sent_without_waiting():
+    bot = FakeBot()
+    service = make_service(bot)
+
+    async def run():
+        started = time.monotonic()
+        result = await service.send_custom_message(1, "hello")
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(run())
+
+    assert result is True
+    assert bot.sent == [(1, "hello", None)]
+    assert elapsed < 0.05
+
+def test_messages_overlapping_an_in_flight_send_are_joined():
+    bot = FakeBot(delay=0.05)
+    service = make_service(bot)
+
+    async def run():
+        first = asyncio.create_task(service.send_custom_message(1, "one"))
+        await asyncio.sleep(0.01)
+        rest = [asyncio.create_task(service.send_custom_message(1, text)) for text in ("two", "three")]
+        return await asyncio.gather(first, *rest)
+
+    results = asyncio.run(run())
+
+    assert results == [True, True, True]
+    assert [text for _, text, _ in bot.sent] == ["one", "two\n\nthree"]
+
+def test_different_parse_modes_are_never_joined():
+    bot = FakeBot(delay=0.05)
+    service = make_service(bot)
+
+    async def run():
+        first = asyncio.create_task(service.send_custom_message(1, "plain"))
+        await asyncio.sleep(0.01)
+        await asyncio.gather(
+            first,
+            service.send_custom_message(1, "*bold*", parse_mode="Markdown"),
+            service.send_custom_message(1, "more plain"),
+        )
+
+    asyncio.run(run())
+
+    assert sorted(bot.sent, key=lambda sent: sent[1]) == [
+        (1, "*bold*", "Markdown"),
+        (1, "more plain", None),
+        (1, "plain", None),
+    ]
+
+def test_broadcast_sends_one_message_per_user_immediately():
+    bot = FakeBot()
+    service = make_service(bot)
+
+    async def run():
+        started = time.monotonic()
+        results = await service.broadcast_message(list(range(20)), "notice")
+        return results, time.monotonic() - started
+
+    results, elapsed = asyncio.run(run())
+
+    assert results == {"success": 20, "failed": 0}
+    assert len(bot.sent) == 20
+    assert elapsed < 0.2
+
+def test_shutdown_flushes_queued_messages():
+    bot = FakeBot(delay=0.05)
+    service = make_service(bot)
+
+    async def run():
+        first = asyncio.create_task(service.send_custom_message(1, "one"))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(service.send_custom_message(1, "two"))
+        await asyncio.sleep(0)
+        await service.shutdown()
+        return await asyncio.wait_for(asyncio.gather(first, queued), timeout=1)
+
+    results = asyncio.run(run())
+
+    assert results == [True, True]
+    assert [text for _, text, _ in bot.sent] == ["one", "two"]
+
+def test_shutdown_resolves_messages_it_could_not_send():
+    bot = FakeBot(delay=10)
+    service = make_service(bot)
+    service.SHUTDOWN_FLUSH_TIMEOUT = 0.05
+
+    async def run():
+        first = asyncio.create_task(service.send_custom_message(1, "one"))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(service.send_custom_message(1, "two"))
+        await asyncio.sleep(0)
+        await service.shutdown()
+        result = await asyncio.wait_for(queued, timeout=1)
+        first.cancel()
+        return result
+
+    assert asyncio.run(run()) is False
+
+def test_sends_after_shutdown_are_refused():
+    bot = FakeBot()
+    service = make_service(bot)
+
+    async def run():
+        await service.shutdown()
+        return await service.send_custom_message(1, "late")
+
+    assert asyncio.run(run()) is False
+    assert bot.sent == []
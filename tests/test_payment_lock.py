@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Tests that the payment confirmation lock is released once verification ends.
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handlers import microservices_handlers as handlers
+from services.user_service import UserService
+
+class FakeRedis:
+    """Supports the SET NX / DELETE pair the payment lock uses."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+class FakeOrchestrator:
+    """Routes payment locks to a real UserService and scripts verification."""
+
+    def __init__(self, verify_error=None):
+        self.users = UserService("user", {})
+        self.users.redis_client = FakeRedis()
+        self.verify_error = verify_error
+        self.verifications = 0
+
+    async def acquire_payment_lock(self, user_id, reference):
+        return await self.users.acquire_payment_lock(user_id, reference)
+
+    async def release_payment_lock(self, user_id, reference):
+        await self.users.release_payment_lock(user_id, reference)
+
+    async def verify_payment(self, reference, user_id):
+        self.verifications += 1
+        if self.verify_error:
+            raise self.verify_error
+        return {"success": True, "payment_successful": False}
+
+class FakeQuery:
+    def __init__(self, user_id, reference):
+        self.data = f"confirm_korapay_{reference}"
+        self.from_user = SimpleNamespace(id=user_id)
+        self.answers = []
+        self.edits = []
+
+    async def answer(self, text=None, show_alert=False):
+        self.answers.append(text)
+
+    async def edit_message_text(self, text, **kwargs):
+        self.edits.append(text)
+
+async def press_confirm(query):
+    await handlers.confirm_korapay_payment_callback(SimpleNamespace(callback_query=query), None)
+    await asyncio.gather(*list(handlers._background_tasks))
+
+def run_two_presses(monkeypatch, orchestrator):
+    monkeypatch.setattr(handlers, "get_orchestrator", lambda: orchestrator)
+
+    async def run():
+        first, second = FakeQuery(1, "ref_1"), FakeQuery(1, "ref_1")
+        await press_confirm(first)
+        await press_confirm(second)
+        return first, second
+
+    return asyncio.run(run())
+
+def test_pending_payment_can_be_checked_again(monkeypatch):
+    orchestrator = FakeOrchestrator()
+
+    _, second = run_two_presses(monkeypatch, orchestrator)
+
+    assert orchestrator.verifications == 2
+    assert "Payment Pending" in second.edits[0]
+    assert orchestrator.users.redis_client.store == {}
+
+def test_lock_is_released_when_verification_fails(monkeypatch):
+    orchestrator = FakeOrchestrator(verify_error=RuntimeError("provider timeout"))
+
+    _, second = run_two_presses(monkeypatch, orchestrator)
+
+    assert orchestrator.verifications == 2
+    assert "Error verifying payment" in second.edits[0]
+    assert orchestrator.users.redis_client.store == {}
+
+def test_press_during_verification_is_refused(monkeypatch):
+    orchestrator = FakeOrchestrator()
+    monkeypatch.setattr(handlers, "get_orchestrator", lambda: orchestrator)
+
+    async def run():
+        first, second = FakeQuery(1, "ref_1"), FakeQuery(1, "ref_1")
+        await handlers.confirm_korapay_payment_callback(SimpleNamespace(callback_query=first), None)
+        await handlers.confirm_korapay_payment_callback(SimpleNamespace(callback_query=second), None)
+        await asyncio.gather(*list(handlers._background_tasks))
+        return second
+
+    second = asyncio.run(run())
+
+    assert orchestrator.verifications == 1
+    assert "already being verified" in second.answers[0]
+
+def test_concurrent_verifications_are_not_shared_between_users(monkeypatch):
+    class OwnershipOrchestrator(FakeOrchestrator):
+        def __init__(self):
+            super().__init__()
+            self.verified_for = []
+
+        async def verify_payment(self, reference, user_id):
+            self.verified_for.append(user_id)
+            await asyncio.sleep(0.01)
+            return {"success": user_id == 1, "payment_successful": False, "error": "Payment not found"}
+
+    orchestrator = OwnershipOrchestrator()
+    monkeypatch.setattr(handlers, "get_orchestrator", lambda: orchestrator)
+
+    async def run():
+        return await asyncio.gather(
+            handlers._verify_payment_once("ref_1", 1),
+            handlers._verify_payment_once("ref_1", 2),
+        )
+
+    owner, other = asyncio.run(run())
+
+    assert sorted(orchestrator.verified_for) == [1, 2]
+    assert owner["success"] and not other["success"]
+
+def test_lock_is_released_when_answering_the_query_fails(monkeypatch):
+    class StaleQuery(FakeQuery):
+        async def answer(self, text=None, show_alert=False):
+            raise RuntimeError("Query is too old and response timeout expired")
+
+    orchestrator = FakeOrchestrator()
+    monkeypatch.setattr(handlers, "get_orchestrator", lambda: orchestrator)
+
+    async def run():
+        stale = StaleQuery(1, "ref_1")
+        await press_confirm(stale)
+        assert orchestrator.users.redis_client.store == {}
+        retry = FakeQuery(1, "ref_1")
+        await press_confirm(retry)
+        return stale, retry
+
+    stale, retry = asyncio.run(run())
+
+    assert "Error verifying payment" in stale.edits[0]
+    assert orchestrator.verifications == 1
+    assert "Payment Pending" in retry.edits[0]
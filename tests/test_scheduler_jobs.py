@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Tests for the scheduled daily jobs in services.scheduler_service.
+"""
+
+import asyncio
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import scheduler_service
+
+FOOD_ITEMS = [
+    {"id": 1, "name": "Bread and Akara", "price": Decimal("1200"), "category": None},
+    {"id": 2, "name": "Jollof Rice", "price": Decimal("1500"), "category": None},
+    {"id": 3, "name": "Amala and Ewedu", "price": Decimal("1800"), "category": None},
+    {"id": 4, "name": "Croaker fish", "price": Decimal("4500"), "category": None},
+]
+
+class FakeDatabase:
+    """Serves the catalogue and users a scheduled run reads."""
+
+    def __init__(self, users, food_items=FOOD_ITEMS, meal_plans=None):
+        self.users = users
+        self.food_items = food_items
+        self.meal_plans = meal_plans or {}
+
+    async def get_all_users_with_budgets(self):
+        return self.users
+
+    async def get_food_items(self, max_price=None):
+        return [item for item in self.food_items if max_price is None or item["price"] <= max_price]
+
+    async def get_meal_plan_names_for_day(self, day_of_week):
+        return self.meal_plans
+
+class Outbox:
+    """Collects messages a job would send to Telegram."""
+
+    def __init__(self):
+        self.messages = {}
+
+    async def send(self, user_id, message):
+        self.messages[user_id] = message
+
+def test_meal_suggestions_only_list_affordable_items():
+    database = FakeDatabase([{"user_id": 1, "daily_allowance": Decimal("2000")}])
+    outbox = Outbox()
+
+    asyncio.run(scheduler_service.scheduled_daily_meal_suggestions(database, outbox.send))
+
+    message = outbox.messages[1]
+    assert "Bread and Akara" in message
+    assert "Jollof Rice" in message
+    assert "Amala and Ewedu" in message
+    assert "Croaker fish" not in message
+
+def test_meal_suggestions_put_custom_plan_first():
+    database = FakeDatabase(
+        [{"user_id": 1, "daily_allowance": Decimal("2000")}],
+        meal_plans={1: "Jollof Rice"}
+    )
+    outbox = Outbox()
+
+    asyncio.run(scheduler_service.scheduled_daily_meal_suggestions(database, outbox.send))
+
+    lines = outbox.messages[1].splitlines()
+    assert lines[2].startswith("⭐ Jollof Rice")
+    assert sum("Jollof Rice" in line for line in lines) == 1
+
+def test_meal_suggestions_report_nothing_affordable():
+    database = FakeDatabase([{"user_id": 1, "daily_allowance": Decimal("500")}])
+    outbox = Outbox()
+
+    asyncio.run(scheduler_service.scheduled_daily_meal_suggestions(database, outbox.send))
+
+    assert "no meals are currently within your daily budget" in outbox.messages[1]
+
+class FakeAllowanceDatabase:
+    """Returns preset deductions and records wallet refunds."""
+
+    def __init__(self, deductions):
+        self.deductions = deductions
+        self.deduct_calls = 0
+        self.refunds = []
+        self.refund_error = None
+
+    async def deduct_daily_allowances(self):
+        self.deduct_calls += 1
+        return self.deductions
+
+    async def refund_daily_allowance(self, user_id, amount):
+        if self.refund_error:
+            raise self.refund_error
+        self.refunds.append((user_id, amount))
+
+class FakeTransferService:
+    """Records transfers, failing for the given account numbers."""
+
+    def __init__(self, failing_accounts=()):
+        self.failing_accounts = set(failing_accounts)
+        self.transfers = []
+
+    async def initiate_transfer(self, user_id, amount, account_number, bank_code, narration, account_name=None):
+        if account_number in self.failing_accounts:
+            raise RuntimeError("Transfer initiation failed: insufficient provider balance")
+        self.transfers.append((user_id, amount, account_number))
+        return {"status": True, "reference": f"ref_{user_id}", "transfer_status": "pending"}
+
+def make_deduction(user_id, account_number):
+    return {
+        "user_id": user_id,
+        "amount": Decimal("1000"),
+        "currency": "NGN",
+        "account_number": account_number,
+        "bank_code": "058",
+        "bank_name": "GTBank",
+        "account_name": "Test User",
+    }
+
+def test_allowance_deduction_needs_a_transfer_service():
+    database = FakeAllowanceDatabase([make_deduction(1, "0123456789")])
+
+    asyncio.run(scheduler_service.scheduled_daily_allowance_deduction(database, Outbox().send, None))
+
+    assert database.deduct_calls == 0
+
+def test_allowance_deduction_transfers_every_deduction():
+    database = FakeAllowanceDatabase([make_deduction(1, "0123456789"), make_deduction(2, "9876543210")])
+    transfers = FakeTransferService()
+    outbox = Outbox()
+
+    asyncio.run(scheduler_service.scheduled_daily_allowance_deduction(database, outbox.send, transfers))
+
+    assert database.deduct_calls == 1
+    assert sorted(user_id for user_id, _, _ in transfers.transfers) == [1, 2]
+    assert "has been sent to your GTBank account" in outbox.messages[1]
+    assert database.refunds == []
+
+def test_failed_transfer_refunds_the_wallet():
+    database = FakeAllowanceDatabase([make_deduction(1, "0123456789"), make_deduction(2, "9876543210")])
+    transfers = FakeTransferService(failing_accounts={"9876543210"})
+    outbox = Outbox()
+
+    asyncio.run(scheduler_service.scheduled_daily_allowance_deduction(database, outbox.send, transfers))
+
+    assert [user_id for user_id, _, _ in transfers.transfers] == [1]
+    assert database.refunds == [(2, Decimal("1000"))]
+    assert "returned to your wallet" in outbox.messages[2]
+
+def test_unaccepted_transfer_refunds_the_wallet():
+    class RejectingTransferService(FakeTransferService):
+        async def initiate_transfer(self, **kwargs):
+            return {"status": False}
+
+    database = FakeAllowanceDatabase([make_deduction(1, "0123456789")])
+    user_id, ok, _ = asyncio.run(scheduler_service.transfer_daily_allowance(
+        make_deduction(1, "0123456789"), database, RejectingTransferService(), Outbox().send
+    ))
+
+    assert (user_id, ok) == (1, False)
+    assert database.refunds == [(1, Decimal("1000"))]
+
+def test_refund_failure_is_reported_not_raised():
+    database = FakeAllowanceDatabase([])
+    database.refund_error = RuntimeError("connection lost")
+    outbox = Outbox()
+
+    user_id, ok, reason = asyncio.run(scheduler_service.transfer_daily_allowance(
+        make_deduction(1, "0123456789"), database, FakeTransferService(failing_accounts={"0123456789"}), outbox.send
+    ))
+
+    assert not ok
+    assert "manual credit" in reason
+    assert outbox.messages == {}
+
+def test_failed_notification_does_not_refund_a_sent_transfer():
+    async def broken_send(user_id, message):
+        raise RuntimeError("bot blocked by user")
+
+    database = FakeAllowanceDatabase([])
+    _, ok, _ = asyncio.run(scheduler_service.transfer_daily_allowance(
+        make_deduction(1, "0123456789"), database, FakeTransferService(), broken_send
+    ))
+
+    assert ok
+    assert database.refunds == []
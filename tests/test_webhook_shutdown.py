@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests that shutdown processes Telegram updates the webhook already acknowledged.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main_microservices import DailyChowApplication
+
+class FakeTelegramApp:
+    """Processes updates slowly and records the order of shutdown steps."""
+
+    def __init__(self, events, delay: float):
+        self.bot = None
+        self.events = events
+        self.delay = delay
+
+    async def process_update(self, update):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.events.append(("cancelled", update.update_id))
+            raise
+        self.events.append(("processed", update.update_id))
+
+    async def stop(self):
+        self.events.append(("telegram_stopped", None))
+
+    async def shutdown(self):
+        pass
+
+class FakeOrchestrator:
+    def __init__(self, events):
+        self.events = events
+
+    async def shutdown(self):
+        self.events.append(("services_stopped", None))
+
+def make_update(update_id: int, chat_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "text": "hi",
+        },
+    }
+
+def make_app(events, delay: float) -> DailyChowApplication:
+    app = DailyChowApplication()
+    app.telegram_app = FakeTelegramApp(events, delay)
+    app.orchestrator = FakeOrchestrator(events)
+    return app
+
+def test_shutdown_processes_queued_updates_before_stopping_services():
+    events = []
+
+    async def run():
+        app = make_app(events, delay=0.02)
+        for update_id, chat_id in [(1, 10), (2, 10), (3, 10), (4, 20)]:
+            assert app._enqueue_update(make_update(update_id, chat_id))
+        await app.shutdown()
+
+    asyncio.run(run())
+
+    processed = [update_id for kind, update_id in events if kind == "processed"]
+    assert sorted(processed) == [1, 2, 3, 4]
+    assert [update_id for update_id in processed if update_id < 4] == [1, 2, 3]
+    first_teardown = min(events.index(("telegram_stopped", None)), events.index(("services_stopped", None)))
+    assert all(events.index(("processed", update_id)) < first_teardown for update_id in processed)
+
+def test_shutdown_gives_up_on_drain_after_timeout():
+    events = []
+
+    async def run():
+        app = make_app(events, delay=10)
+        app.UPDATE_DRAIN_TIMEOUT = 0.05
+        assert app._enqueue_update(make_update(1, 10))
+        await asyncio.wait_for(app.shutdown(), timeout=2)
+        return app
+
+    app = asyncio.run(run())
+
+    assert ("processed", 1) not in events
+    # The stuck handler is cancelled before anything it might use is torn down
+    assert events.index(("cancelled", 1)) < events.index(("services_stopped", None))
+    assert events.index(("cancelled", 1)) < events.index(("telegram_stopped", None))
+    assert all(worker.done() for worker in app._chat_workers.values())
@@ -55,33 +55,39 @@ def check_environment():
     
     return database_url
 
-def test_database_connection(database_url):
-    """Test actual database connection"""
+def connect_database(database_url):
+    """Open the single connection shared by all database tests"""
     print("\n🔧 DATABASE CONNECTION TEST")
     print("=" * 50)
     
-    if not database_url:
-        print("❌ No DATABASE_URL to test")
-        return False
-    
     try:
         print("Attempting to connect to database...")
         conn = psycopg2.connect(database_url)
         print("✅ Database connection successful!")
-        
-        # Test basic query
+        return conn
+    except psycopg2.Error as e:
+        print(f"❌ Database connection failed: {e}")
+        print(f"   Error code: {e.pgcode if hasattr(e, 'pgcode') else 'Unknown'}")
+        return None
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return None
+
+def test_database_connection(conn):
+    """Test basic queries on an open connection"""
+    try:
         with conn.cursor() as cur:
-            cur.execute("SELECT version();")
-            version = cur.fetchone()[0]
-            print(f"✅ Database version: {version}")
-            
-            # Check if our tables exist
+            # Version and table existence in one round trip
             cur.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public' AND table_name IN ('users', 'food_items', 'spending_history')
+                SELECT version(), (
+                    SELECT array_agg(table_name::text)
+                    FROM information_schema.tables 
+                    WHERE table_schema = 'public' AND table_name IN ('users', 'food_items', 'spending_history')
+                )
             """)
-            tables = [row[0] for row in cur.fetchall()]
+            version, tables = cur.fetchone()
+            tables = tables or []
+            print(f"✅ Database version: {version}")
             print(f"✅ Tables found: {tables}")
             
             if 'users' in tables:
@@ -91,29 +97,24 @@ def test_database_connection(database_url):
             else:
                 print("⚠️  Users table not found - need to run initialize_database()")
         
-        conn.close()
+        conn.commit()
         return True
         
     except psycopg2.Error as e:
-        print(f"❌ Database connection failed: {e}")
+        print(f"❌ Database query failed: {e}")
         print(f"   Error code: {e.pgcode if hasattr(e, 'pgcode') else 'Unknown'}")
+        conn.rollback()
         return False
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
         return False
 
-def test_table_operations(database_url):
+def test_table_operations(conn):
     """Test basic table operations"""
     print("\n🧪 TABLE OPERATIONS TEST")
     print("=" * 50)
     
-    if not database_url:
-        print("❌ No DATABASE_URL to test")
-        return
-    
     try:
-        conn = psycopg2.connect(database_url)
-        
         # Test user creation
         test_user_id = 999999999  # Test user ID
         
@@ -145,14 +146,11 @@ def test_table_operations(database_url):
             print(f"✅ Test user cleanup: {cur.rowcount} rows affected")
             
         conn.commit()
-        conn.close()
         print("✅ All table operations successful!")
         
     except psycopg2.Error as e:
         print(f"❌ Table operations failed: {e}")
-        if conn:
-            conn.rollback()
-            conn.close()
+        conn.rollback()
     except Exception as e:
         print(f"❌ Unexpected error in table operations: {e}")
 
@@ -167,10 +165,15 @@ def main():
     
     # Test database connection
     if database_url:
-        connection_ok = test_database_connection(database_url)
-        
-        if connection_ok:
-            test_table_operations(database_url)
+        conn = connect_database(database_url)
+        if conn:
+            try:
+                if test_database_connection(conn):
+                    test_table_operations(conn)
+                else:
+                    print("\n❌ Cannot proceed with table tests - database queries failed")
+            finally:
+                conn.close()
         else:
             print("\n❌ Cannot proceed with table tests - database connection failed")
     else: